@@ -0,0 +1,61 @@
+import threading
+from collections import OrderedDict
+
+from kivy.core.audio import SoundLoader
+from kivy.logger import Logger
+
+
+class SoundCache:
+    """已載入（解碼）的鬧鐘音樂 LRU 快取
+
+    preload() 在背景執行緒載入，鬧鐘響時 get() 直接取用；
+    尚未載入完成才在呼叫端同步載入。超出容量的音樂會 unload。
+    """
+
+    def __init__(self, size=3):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._sounds = OrderedDict()  # 路徑 -> Sound
+        self._loading = set()
+        self._lock = threading.Lock()
+
+    def preload(self, path):
+        with self._lock:
+            if path in self._sounds or path in self._loading:
+                return
+            self._loading.add(path)
+        threading.Thread(target=self._load, args=(path,), daemon=True).start()
+
+    def _load(self, path):
+        try:
+            sound = SoundLoader.load(path)
+        except Exception:
+            Logger.exception(f"Audio: failed to load {path}")
+            sound = None
+        with self._lock:
+            self._loading.discard(path)
+            if sound is not None:
+                self._put(path, sound)
+
+    def _put(self, path, sound):
+        self._sounds[path] = sound
+        self._sounds.move_to_end(path)
+        while len(self._sounds) > self.size:
+            _, old = self._sounds.popitem(last=False)
+            old.unload()
+
+    def get(self, path):
+        """取得已載入的音樂，不在快取中就同步載入"""
+        with self._lock:
+            sound = self._sounds.get(path)
+            if sound is not None:
+                self._sounds.move_to_end(path)
+                self.hits += 1
+                return sound
+            self.misses += 1
+        sound = SoundLoader.load(path)
+        if sound is not None:
+            with self._lock:
+                self._put(path, sound)
+        return sound
@@ -0,0 +1,50 @@
+"""比較 Label 與 CachedLabel 建立重複文字的耗時，以及子集字體的大小
+
+    STUDY_FONT_SUBSET=1 python benchmarks/bench_label_cache.py [數量]
+
+需要 Kivy 與可用的視窗（貼圖需要 OpenGL context）。
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+os.environ.setdefault("KIVY_NO_ARGS", "1")
+
+from kivy.core.window import Window  # noqa: E402,F401  建立 OpenGL context
+from kivy.uix.label import Label  # noqa: E402
+
+import fonts  # noqa: E402
+
+TEXTS = ["刪除", "已完成", "完成今日進度", "返回"]
+
+
+def render(label_class, count):
+    started = time.perf_counter()
+    for i in range(count):
+        label = label_class(text=TEXTS[i % len(TEXTS)], font_name=fonts.FONT_NAME)
+        label.texture_update()
+    return time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    fonts.register_fonts()
+    if fonts.use_subset():
+        with open(fonts.SUBSET_MANIFEST, "r", encoding="utf-8") as file:
+            import json
+            subset_path = json.load(file)["path"]
+        print(f"字體大小  完整: {os.path.getsize(fonts.FONT_PATH) / 1024:8.0f} KiB"
+              f"   子集: {os.path.getsize(subset_path) / 1024:8.0f} KiB")
+
+    plain = render(Label, count)
+    cached = render(fonts.CachedLabel, count)
+    print(f"Label 數量: {count}")
+    print(f"Label       : {plain * 1000:8.1f} ms")
+    print(f"CachedLabel : {cached * 1000:8.1f} ms   (hits={fonts.TEXTURE_CACHE.hits}, misses={fonts.TEXTURE_CACHE.misses})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""比較字典格式與 Plan 的記憶體用量及過期判斷速度
+
+    python benchmarks/bench_plan_memory.py [計劃數量]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plan_model import Plan  # noqa: E402
+
+
+def make_dicts(count):
+    start = date(2024, 1, 1)
+    return [
+        {
+            "name": f"計劃{i}",
+            "due_date": (start + timedelta(days=i % 720)).strftime("%Y-%m-%d"),
+            "daily": i % 2 == 0,
+            "weekly": i % 2 == 1,
+            "create_date": (start + timedelta(days=i % 30)).strftime("%Y-%m-%d"),
+            "status": "Pending"
+        }
+        for i in range(count)
+    ]
+
+
+def measure(build):
+    tracemalloc.start()
+    items = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return items, current
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    source = make_dicts(count)
+
+    dicts, dict_bytes = measure(lambda: [dict(item) for item in source])
+    plans, plan_bytes = measure(lambda: [Plan.from_dict(item) for item in source])
+
+    today = date(2025, 1, 1)
+    started = time.perf_counter()
+    overdue_dicts = sum(1 for item in dicts
+                        if datetime.strptime(item["due_date"], "%Y-%m-%d").date() < today)
+    dict_seconds = time.perf_counter() - started
+
+    limit = today.toordinal()
+    started = time.perf_counter()
+    overdue_plans = sum(1 for plan in plans if plan.due < limit)
+    plan_seconds = time.perf_counter() - started
+    assert overdue_dicts == overdue_plans
+
+    print(f"計劃數量: {count}")
+    print(f"記憶體  dict: {dict_bytes / 1024 / 1024:8.2f} MiB   Plan: {plan_bytes / 1024 / 1024:8.2f} MiB")
+    print(f"過期判斷 dict: {dict_seconds * 1000:8.1f} ms    Plan: {plan_seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
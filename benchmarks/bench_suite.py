@@ -0,0 +1,332 @@
+"""資料層（與畫面）的效能測試：產生不同規模的資料，量測各路徑的耗時與記憶體峰值
+
+    python benchmarks/bench_suite.py [--scenario 計劃數x天數 ...] [--storage json,sqlite]
+                                     [--output bench_results.json]
+                                     [--baseline 舊結果.json --threshold 1.25 --threshold load_data=1.5]
+
+預設只量測不需要 Kivy 的資料層（model-only）；加上 --render 會另外建立 StudyHelperApp
+量測 build 與清單更新，需要 Kivy 與可用的視窗（沒有顯示器時可用 xvfb-run）。
+指定 --baseline 時與舊結果比較，任何路徑比舊結果慢超過門檻倍數就以狀態碼 1 結束。
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date, datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from history import CheckinBits  # noqa: E402
+from log_store import LOG_VERSION  # noqa: E402
+from plan_model import Frequency, Plan  # noqa: E402
+from plan_search import PlanFilter, PlanIndex  # noqa: E402
+from stats import StatsModel  # noqa: E402
+from storage import DATA_VERSION, open_store  # noqa: E402
+from study_core import StudyCore, plan_row, progress_row  # noqa: E402  與 App 相同的列資料
+
+DEFAULT_SCENARIOS = ["10x1", "1000x365", "10000x365", "100000x30", "100x1825"]
+TODAY = date.today()
+
+
+def make_dataset(folder, plan_count, days, seed=0):
+    """在 folder 寫入 study_data.json 與 log.json：plan_count 個進行中的計劃、days 天的簽到記錄"""
+    rng = random.Random(seed)
+    today = TODAY.toordinal()
+    created = today - days + 1
+    plans, history = [], {}
+    for plan_id in range(1, plan_count + 1):
+        frequency = Frequency.DAILY if plan_id % 2 else Frequency.WEEKLY
+        plan = Plan(f"計劃{plan_id}", today + rng.randint(0, 365), frequency, created, plan_id=plan_id)
+        plans.append(plan.to_dict())
+        bits = CheckinBits(created)
+        step = 1 if plan.daily else 7
+        for day in range(created, today, step):  # 今天留給 save_log
+            if rng.random() < 0.7:
+                bits.add(day)
+        history[str(plan_id)] = bits.to_dict()
+    with open(os.path.join(folder, "study_data.json"), "w") as file:
+        json.dump({"version": DATA_VERSION, "next_id": plan_count + 1, "plans": plans}, file)
+    with open(os.path.join(folder, "log.json"), "w") as file:
+        json.dump({"version": LOG_VERSION, "history": history}, file)
+
+
+class Session:
+    """一份資料與儲存後端，以 StudyCore 開啟（與 App 相同）"""
+
+    def __init__(self, folder, storage):
+        self.folder = folder
+        self.storage = storage
+        self.store = None
+        self.core = None
+        self.model = None
+
+    def open(self):
+        self.close()
+        self.store = open_store(self.storage)
+        self.core = StudyCore(self.store)
+        self.model = self.core.model
+
+    def close(self):
+        if self.store is not None:
+            self.store.close()
+            self.store = self.core = self.model = None
+
+
+def fresh_session(base, storage):
+    """由 base 複製一份新的資料並開啟：save_data/save_log 會寫入，每次量測都從相同的資料開始"""
+    work = base + ".run"
+    shutil.rmtree(work, ignore_errors=True)
+    shutil.copytree(base, work)
+    os.chdir(work)
+    session = Session(work, storage)
+    session.open()
+    return session
+
+
+def path_load_data(session):
+    session.close()
+    started = time.perf_counter()
+    session.open()
+    return time.perf_counter() - started, 1
+
+
+def path_save_data(session):
+    today = TODAY.toordinal()
+    session.model.add(Plan("效能測試", today + 30, Frequency.DAILY, today))
+    session.store.flush()  # 包含實際寫入檔案/資料庫
+    return None, 1
+
+
+def path_save_log(session, ops=100):
+    plans = list(session.model.plans.values())[:ops]
+    for plan in plans:
+        session.core.save_log(plan, TODAY)  # 資料集沒有今天的記錄，每次都是新的記錄
+    session.store.flush()
+    return None, len(plans)
+
+
+def path_check_log(session):
+    due = session.core.due_today(TODAY)
+    for plan in due:
+        session.core.check_log(plan, TODAY)
+    return None, len(due)
+
+
+def path_update_plan_list(session):
+    rows = [plan_row(plan) for plan in session.model.plans.values()]
+    return None, len(rows)
+
+
+def path_update_progress_list(session):
+    rows = [progress_row(session.core, plan, TODAY) for plan in session.core.due_today(TODAY)]
+    return None, len(rows)
+
+
+def path_stats_build(session):
+    stats = StatsModel(session.model)
+    stats.build(TODAY.toordinal())
+    return None, len(stats.plans)
+
+
+def path_search_index(session):
+    index = PlanIndex(session.model.plans.values())
+    return None, len(index.plans)
+
+
+SEARCH_QUERIES = ("計", "計劃", "劃1", "計劃12", "計劃123")  # 模擬逐字輸入
+
+
+def path_search_query(session):
+    """每次輸入的查詢（不含建立索引）"""
+    index = PlanIndex(session.model.plans.values())
+    started = time.perf_counter()
+    for text in SEARCH_QUERIES:
+        index.query(PlanFilter(text, sort_by_due=True))
+    return time.perf_counter() - started, len(SEARCH_QUERIES)
+
+
+PATHS = {
+    "load_data": path_load_data,
+    "save_data": path_save_data,
+    "save_log": path_save_log,
+    "check_log": path_check_log,
+    "update_plan_list": path_update_plan_list,
+    "update_progress_list": path_update_progress_list,
+    "stats_build": path_stats_build,
+    "search_index": path_search_index,
+    "search_query": path_search_query,
+}
+
+
+def run_path(base, storage, name, repeat):
+    """回傳 (最短耗時, 記憶體峰值, 操作數)；耗時與記憶體分開量測，tracemalloc 不影響計時
+
+    每次量測都使用 base 的新複本，結果與 --repeat 和路徑的順序無關。
+    """
+    function = PATHS[name]
+    best = None
+    ops = 0
+    for _ in range(repeat):
+        session = fresh_session(base, storage)
+        started = time.perf_counter()
+        seconds, ops = function(session)
+        seconds = time.perf_counter() - started if seconds is None else seconds
+        best = seconds if best is None else min(best, seconds)
+        session.close()
+    session = fresh_session(base, storage)
+    tracemalloc.start()
+    function(session)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    session.close()
+    return best, peak, ops
+
+
+def run_render(folder, repeat):
+    """建立 StudyHelperApp 量測 build 與切換頁面時的清單更新"""
+    os.environ.setdefault("KIVY_NO_ARGS", "1")
+    import main  # noqa: E402  需要 Kivy
+
+    results = []
+    app = main.StudyHelperApp()
+    steps = [
+        ("build", app.build),
+        ("update_plan_list", lambda: app.switch_screen("view_plans") or app.update_plan_list()),
+        ("update_progress_list", lambda: app.switch_screen("progress") or app.update_progress_list()),
+        ("stats_screen", lambda: app.switch_screen("stats")),
+    ]
+    for name, step in steps:
+        best = None
+        for _ in range(1 if name == "build" else repeat):
+            started = time.perf_counter()
+            step()
+            seconds = time.perf_counter() - started
+            best = seconds if best is None else min(best, seconds)
+        results.append({"path": f"render.{name}", "seconds": best, "peak_bytes": None, "ops": 1})
+    app.store.close()
+    return results
+
+
+def parse_scenario(text):
+    plans, days = text.lower().split("x")
+    return int(plans), int(days)
+
+
+def parse_thresholds(values):
+    """["1.25", "load_data=1.5"] -> (預設倍數, {路徑: 倍數})"""
+    default, per_path = 1.25, {}
+    for value in values:
+        if "=" in value:
+            path, ratio = value.split("=", 1)
+            per_path[path] = float(ratio)
+        else:
+            default = float(value)
+    return default, per_path
+
+
+def result_key(result):
+    return (result["scenario"], result["storage"], result["path"])
+
+
+def compare(results, baseline, thresholds, min_seconds):
+    """回傳超過門檻的項目；耗時低於 min_seconds 的項目誤差太大，不比較"""
+    default, per_path = thresholds
+    old = {result_key(result): result for result in baseline["results"]}
+    failures = []
+    for result in results:
+        before = old.get(result_key(result))
+        if before is None or max(before["seconds"], result["seconds"]) < min_seconds:
+            continue
+        limit = per_path.get(result["path"], default)
+        ratio = result["seconds"] / before["seconds"] if before["seconds"] else float("inf")
+        if ratio > limit:
+            failures.append((result, before, ratio, limit))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", help="計劃數x天數，例如 1000x365（可重複）")
+    parser.add_argument("--storage", default="json,sqlite", help="要量測的儲存後端，以逗號分隔")
+    parser.add_argument("--path", action="append", choices=sorted(PATHS), help="只量測指定的路徑（可重複）")
+    parser.add_argument("--repeat", type=int, default=3, help="每個路徑量測幾次，取最短耗時")
+    parser.add_argument("--render", action="store_true", help="另外量測畫面路徑（需要 Kivy）")
+    parser.add_argument("--output", default="bench_results.json", help="結果 JSON 檔")
+    parser.add_argument("--baseline", help="比較用的舊結果 JSON 檔")
+    parser.add_argument("--threshold", action="append", default=[],
+                        help="允許變慢的倍數，預設 1.25；可用 路徑=倍數 個別設定")
+    parser.add_argument("--min-seconds", type=float, default=0.005, help="低於此耗時的項目不比較")
+    args = parser.parse_args()
+
+    scenarios = args.scenario or DEFAULT_SCENARIOS
+    storages = [kind for kind in args.storage.split(",") if kind]
+    paths = args.path or list(PATHS)
+    results = []
+    for scenario in scenarios:
+        plan_count, days = parse_scenario(scenario)
+        folder = tempfile.mkdtemp(prefix="study_bench_")
+        cwd = os.getcwd()
+        try:
+            make_dataset(folder, plan_count, days)
+            for storage in storages:
+                # 每個後端一份基準資料，sqlite 第一次開啟時的匯入不計入
+                base = os.path.join(folder, storage)
+                os.makedirs(base)
+                for name in ("study_data.json", "log.json"):
+                    shutil.copy(os.path.join(folder, name), base)
+                os.chdir(base)
+                session = Session(base, storage)
+                session.open()
+                session.close()
+                for name in paths:
+                    seconds, peak, ops = run_path(base, storage, name, args.repeat)
+                    results.append({"scenario": scenario, "storage": storage, "path": name,
+                                    "seconds": seconds, "peak_bytes": peak, "ops": ops})
+                    print(f"{scenario:>11} {storage:>6} {name:<22} {seconds * 1000:10.2f} ms"
+                          f" {peak / 1024 / 1024:9.2f} MiB  ({ops} ops)")
+                os.chdir(cwd)
+            if args.render:
+                os.chdir(os.path.join(folder, storages[0]))
+                for result in run_render(folder, args.repeat):
+                    result.update(scenario=scenario, storage=storages[0])
+                    results.append(result)
+                    print(f"{scenario:>11} {storages[0]:>6} {result['path']:<22} {result['seconds'] * 1000:10.2f} ms")
+        finally:
+            os.chdir(cwd)
+            shutil.rmtree(folder, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "created": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f"結果已寫入 {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            baseline = json.load(file)
+        failures = compare(results, baseline, parse_thresholds(args.threshold), args.min_seconds)
+        for result, before, ratio, limit in failures:
+            print(f"變慢: {result['scenario']} {result['storage']} {result['path']} "
+                  f"{before['seconds'] * 1000:.2f} ms -> {result['seconds'] * 1000:.2f} ms "
+                  f"(x{ratio:.2f} > x{limit:.2f})")
+        if failures:
+            sys.exit(1)
+        print("沒有超過門檻的項目")
+
+
+if __name__ == "__main__":
+    main()
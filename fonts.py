@@ -0,0 +1,201 @@
+import glob
+import hashlib
+import json
+import os
+import string
+import threading
+from collections import OrderedDict
+
+from kivy.clock import Clock
+from kivy.core.text import LabelBase
+from kivy.logger import Logger
+from kivy.uix.button import Button
+from kivy.uix.label import Label
+
+FONT_NAME = "NotoSerifCJKtc"  # 顯示用字體，開啟子集化時只包含用得到的字
+INPUT_FONT_NAME = "NotoSerifCJKtcFull"  # 輸入框用完整字體，使用者可能輸入任何字
+FONT_PATH = r'10_NotoSerifCJKtc\OTF\TraditionalChinese\NotoSerifCJKtc-Regular.otf'
+SUBSET_DIR = "font_cache"
+SUBSET_MANIFEST = os.path.join(SUBSET_DIR, "subset.json")
+
+_covered = None  # 子集已包含的字；None 表示未開啟子集化
+_building = False
+_lock = threading.Lock()
+
+
+def register_fonts():
+    """註冊繁體中文字體（完整字體）"""
+    LabelBase.register(name=FONT_NAME, fn_regular=FONT_PATH)
+    LabelBase.register(name=INPUT_FONT_NAME, fn_regular=FONT_PATH)
+
+
+def subset_enabled():
+    return os.environ.get("STUDY_FONT_SUBSET") == "1"
+
+
+def ui_chars():
+    """介面會顯示的字：原始碼中的非 ASCII 字元加上可列印的 ASCII
+
+    掃描專案目錄下所有的 .py，新增的模組（包含錯誤訊息）不必另外登記。
+    """
+    chars = set(string.printable)
+    base = os.path.dirname(os.path.abspath(__file__))
+    for path in glob.glob(os.path.join(base, "*.py")):
+        with open(path, "r", encoding="utf-8") as file:
+            chars.update(ch for ch in file.read() if ord(ch) > 127)
+    return chars
+
+
+def _build_subset(chars):
+    """用 fontTools 產生只含 chars 的字體檔，回傳檔案路徑"""
+    from fontTools import subset
+
+    digest = hashlib.sha1("".join(sorted(chars)).encode("utf-8")).hexdigest()[:12]
+    path = os.path.join(SUBSET_DIR, f"{FONT_NAME}-{digest}.otf")
+    if not os.path.exists(path):
+        os.makedirs(SUBSET_DIR, exist_ok=True)
+        options = subset.Options()
+        font = subset.load_font(FONT_PATH, options)
+        subsetter = subset.Subsetter(options)
+        subsetter.populate(text="".join(chars))
+        subsetter.subset(font)
+        subset.save_font(font, path + ".tmp", options)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def _save_manifest(path, chars):
+    with open(SUBSET_MANIFEST, "w", encoding="utf-8") as file:
+        json.dump({"path": path, "chars": "".join(sorted(chars))}, file, ensure_ascii=False)
+
+
+def use_subset(texts=()):
+    """開啟子集化：涵蓋介面文字與 texts（計劃名稱），已有的子集足夠就直接沿用
+
+    需要 fontTools；沒有安裝或未設定 STUDY_FONT_SUBSET=1 時繼續使用完整字體。
+    """
+    global _covered
+    if not subset_enabled():
+        return False
+    try:
+        import fontTools  # noqa: F401
+    except ImportError:
+        Logger.warning("Fonts: fontTools is not installed, using the full font")
+        return False
+    needed = ui_chars()
+    for text in texts:
+        needed.update(text)
+    path = None
+    if os.path.exists(SUBSET_MANIFEST):
+        with open(SUBSET_MANIFEST, "r", encoding="utf-8") as file:
+            manifest = json.load(file)
+        covered = set(manifest["chars"])
+        if needed <= covered and os.path.exists(manifest["path"]):
+            path, needed = manifest["path"], covered
+    if path is None:
+        path = _build_subset(needed)
+        _save_manifest(path, needed)
+    LabelBase.register(name=FONT_NAME, fn_regular=path)
+    _covered = needed
+    return True
+
+
+def _extend_subset(chars):
+    global _building
+    try:
+        path = _build_subset(chars)
+        _save_manifest(path, chars)
+    except Exception:
+        Logger.exception("Fonts: failed to rebuild the font subset")
+        with _lock:
+            _building = False
+        return
+
+    def apply(dt):
+        global _covered, _building
+        LabelBase.register(name=FONT_NAME, fn_regular=path)
+        with _lock:
+            _covered = chars
+            _building = False
+
+    Clock.schedule_once(apply)
+
+
+def font_for(text):
+    """text 的字都在子集中就用子集，否則暫用完整字體並在背景補上缺少的字"""
+    global _building
+    if _covered is None or _covered.issuperset(text):
+        return FONT_NAME
+    with _lock:
+        if not _building:
+            _building = True
+            chars = _covered | set(text)
+            threading.Thread(target=_extend_subset, args=(chars,), daemon=True).start()
+    return INPUT_FONT_NAME
+
+
+class TextureCache:
+    """已繪製文字貼圖的 LRU 快取"""
+
+    def __init__(self, size=256):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._textures = OrderedDict()
+
+    def get(self, key):
+        texture = self._textures.get(key)
+        if texture is None:
+            self.misses += 1
+            return None
+        self._textures.move_to_end(key)
+        self.hits += 1
+        return texture
+
+    def put(self, key, texture):
+        self._textures[key] = texture
+        self._textures.move_to_end(key)
+        while len(self._textures) > self.size:
+            self._textures.popitem(last=False)
+
+
+TEXTURE_CACHE = TextureCache()
+
+
+class CachedTextureMixin:
+    """相同 (文字, 字體, 大小, 顏色...) 的 Label 共用同一張貼圖，不重新繪製"""
+
+    def _texture_key(self):
+        color = self.disabled_color if self.disabled else self.color
+        return (self.text, self.font_name, self.font_size, tuple(color), tuple(self.text_size),
+                self.halign, self.valign, self.bold, self.italic, tuple(self.padding))
+
+    def texture_update(self, *largs):
+        if self.markup or not self.text:
+            return super().texture_update(*largs)
+        key = self._texture_key()
+        texture = TEXTURE_CACHE.get(key)
+        if texture is None:
+            super().texture_update(*largs)
+            if self.texture is not None:
+                TEXTURE_CACHE.put(key, self.texture)
+                # 下次繪製建立新貼圖，避免覆寫已放入快取的這一張
+                self._label.texture = None
+        else:
+            self.texture = texture
+            self.texture_size = list(texture.size)
+
+
+class CachedLabel(CachedTextureMixin, Label):
+    pass
+
+
+class DynamicLabel(Label):
+    """顯示使用者資料（計劃名稱、檔案路徑、匯入錯誤）的 Label，文字改變時以 font_for 選擇字體"""
+
+    def on_text(self, instance, text):
+        self.font_name = font_for(text)
+
+
+class CachedButton(CachedTextureMixin, Button):
+    pass
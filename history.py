@@ -0,0 +1,136 @@
+import base64
+from datetime import date
+
+
+def _popcount(value):
+    return bin(value).count("1")
+
+
+class CheckinBits:
+    """一個計劃的簽到記錄：從起始日（計劃的 create_date）起每天一個位元
+
+    第 i 個位元代表 start + i 那天是否完成，查詢與新增都是 O(1)；
+    區間的完成天數以 popcount 計算。序列化為 {"start": 日期, "bits": base64}。
+    """
+
+    __slots__ = ("start", "_bytes")
+
+    def __init__(self, start, data=b""):
+        self.start = start  # 起始日序數
+        self._bytes = bytearray(data)
+
+    @classmethod
+    def from_dates(cls, dates, start=None):
+        """由 YYYY-MM-DD 字串建立（原本 log.json 的格式）"""
+        return cls.from_ordinals([date.fromisoformat(text).toordinal() for text in dates], start)
+
+    @classmethod
+    def from_ordinals(cls, ordinals, start=None):
+        """由日期序數建立"""
+        if start is None:
+            start = min(ordinals) if ordinals else date.today().toordinal()
+        start = min([start] + ordinals)  # 早於起始日的記錄也保留
+        value = 0
+        for ordinal in ordinals:
+            value |= 1 << (ordinal - start)
+        return cls(start, value.to_bytes((value.bit_length() + 7) // 8, "little"))
+
+    def dates(self):
+        """所有完成的日期（YYYY-MM-DD，由舊到新）"""
+        result = []
+        for index, byte in enumerate(self._bytes):
+            while byte:
+                low = byte & -byte
+                result.append(date.fromordinal(self.start + index * 8 + low.bit_length() - 1).isoformat())
+                byte ^= low
+        return result
+
+    def rebase(self, start):
+        """把起始日提前到 start，原有的位元往後移"""
+        if start >= self.start:
+            return
+        value = int.from_bytes(self._bytes, "little") << (self.start - start)
+        self._bytes = bytearray(value.to_bytes((value.bit_length() + 7) // 8, "little"))
+        self.start = start
+
+    def has(self, day):
+        """day（日期序數）是否完成"""
+        offset = day - self.start
+        if offset < 0 or offset >> 3 >= len(self._bytes):
+            return False
+        return bool(self._bytes[offset >> 3] >> (offset & 7) & 1)
+
+    def add(self, day):
+        """標記 day 完成，已完成則回傳 False"""
+        if day < self.start:
+            self.rebase(day)
+        offset = day - self.start
+        index = offset >> 3
+        if index >= len(self._bytes):
+            self._bytes.extend(bytes(index + 1 - len(self._bytes)))
+        mask = 1 << (offset & 7)
+        if self._bytes[index] & mask:
+            return False
+        self._bytes[index] |= mask
+        return True
+
+    def window(self, first, last):
+        """first 到 last（日期序數，含）的位元，回傳 (整數, 天數)，第 0 位是 first"""
+        if last < first:
+            return 0, 0
+        value = int.from_bytes(self._bytes, "little")
+        if first >= self.start:
+            value >>= first - self.start
+        else:
+            value <<= self.start - first
+        length = last - first + 1
+        return value & ((1 << length) - 1), length
+
+    def count(self, first=None, last=None):
+        """first 到 last（日期序數，含）之間完成的天數"""
+        if first is None and last is None:
+            return sum(_popcount(byte) for byte in self._bytes)
+        first = self.start if first is None else first
+        last = self.start + len(self._bytes) * 8 - 1 if last is None else last
+        return _popcount(self.window(first, last)[0])
+
+    def completion_rate(self, first, last):
+        """first 到 last 之間完成的比例"""
+        days = last - first + 1
+        return self.count(first, last) / days if days > 0 else 0.0
+
+    def streak(self, day):
+        """到 day 為止（含）連續完成的天數；day 尚未完成時從前一天算起"""
+        if not self.has(day):
+            day -= 1
+        value, length = self.window(self.start, day)
+        if not length:
+            return 0
+        # 最高位是 day，找出從最高位往下連續的 1
+        inverted = ~value & ((1 << length) - 1)
+        return length - inverted.bit_length()
+
+    def longest_streak(self):
+        value = int.from_bytes(self._bytes, "little")
+        longest = 0
+        while value:
+            value &= value >> 1
+            longest += 1
+        return longest
+
+    def to_bytes(self):
+        """位元組（第 0 位是起始日），不含結尾的 0"""
+        return bytes(self._bytes.rstrip(b"\0"))
+
+    def to_dict(self):
+        return {
+            "start": date.fromordinal(self.start).isoformat(),
+            "bits": base64.b64encode(self.to_bytes()).decode("ascii")
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(date.fromisoformat(data["start"]).toordinal(), base64.b64decode(data["bits"]))
+
+    def __repr__(self):
+        return f"CheckinBits({self.to_dict()!r})"
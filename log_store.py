@@ -0,0 +1,241 @@
+import json
+import locale
+import os
+import threading
+from datetime import date
+
+from history import CheckinBits
+from persistence import write_json_atomic
+
+LOG_VERSION = 2  # 2: 每個計劃存成 CheckinBits；1: {計劃: [日期, ...]}
+
+
+class LogStore:
+    """log.json 的記憶體快取，以 {計劃: CheckinBits} 建立索引
+
+    每次簽到只在 journal (JSONL) 尾端附加一行（刪除計劃時附加一筆刪除記錄），log.json 作為快照，
+    由 compact() 在啟動或結束時把 journal 併入快照。
+    有 writer 時，journal 的寫入交給背景執行緒。
+    快照以位元組保存（見 CheckinBits），仍可讀取舊版的日期清單格式，
+    export_dates() 可轉回舊格式。
+    """
+
+    def __init__(self, path="log.json", journal_path=None, writer=None):
+        self.path = path
+        self.journal_path = journal_path or os.path.splitext(path)[0] + ".journal.jsonl"
+        self.writer = writer
+        self._index = {}
+        self._pending = []  # 尚未寫入 journal 的記錄
+        self._lock = threading.Lock()
+        self._stamp = None  # 快照與 journal 的 (mtime, size)，用來判斷檔案是否被外部修改
+
+    @staticmethod
+    def _stat_file(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _stat(self):
+        return (self._stat_file(self.path), self._stat_file(self.journal_path))
+
+    def refresh(self):
+        """檔案的 mtime 或大小改變時才重新讀取"""
+        with self._lock:
+            stamp = self._stat()
+            if stamp != (None, None) and stamp == self._stamp:
+                return
+            index = self._read()
+            self._replay(index)
+            for key, day in self._pending:
+                self._apply(index, key, day)
+            for key, bits in self._index.items():
+                if key in index:
+                    index[key].rebase(bits.start)  # 保留 set_origin 設定的起始日
+                elif not bits.count():
+                    index[key] = bits  # 還沒有記錄的計劃
+            self._index = index
+            self._stamp = stamp
+
+    def _read(self):
+        if not os.path.exists(self.path):
+            return {}
+        with open(self.path, "rb") as file:
+            raw = file.read()
+        try:
+            text = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            # 舊版以系統語系寫入、以計劃名稱為 key 的 log.json
+            text = raw.decode(locale.getpreferredencoding(False), errors="replace")
+        try:
+            log_data = json.loads(text)
+        except json.JSONDecodeError:
+            return {}
+        if not isinstance(log_data, dict):
+            return {}
+        if log_data.get("version") == LOG_VERSION:
+            return {key: CheckinBits.from_dict(item) for key, item in log_data["history"].items()}
+        return {key: CheckinBits.from_dates(dates) for key, dates in log_data.items()}
+
+    @staticmethod
+    def _bits(index, key, day):
+        bits = index.get(key)
+        if bits is None:
+            bits = index[key] = CheckinBits(day)
+        return bits
+
+    @classmethod
+    def _apply(cls, index, key, day):
+        """套用一筆記錄；day 為 None 表示刪除這個計劃的所有記錄"""
+        if day is None:
+            index.pop(key, None)
+        else:
+            cls._bits(index, key, day).add(day)
+
+    def _replay(self, index):
+        """把 journal 中的記錄套用到索引上"""
+        if not os.path.exists(self.journal_path):
+            return 0
+        count = 0
+        with open(self.journal_path, "r", encoding="utf-8", errors="replace") as file:
+            for line in file:
+                try:
+                    record = json.loads(line)
+                    key = record["key"]
+                    day = None if record.get("deleted") else date.fromisoformat(record["date"]).toordinal()
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                    continue  # 寫到一半中斷的最後一行
+                self._apply(index, key, day)
+                count += 1
+        return count
+
+    def has(self, key, date_text):
+        """O(1) 查詢某計劃在某日是否有記錄（不檢查檔案，需先呼叫 refresh）"""
+        bits = self._index.get(key)
+        return bits is not None and bits.has(date.fromisoformat(date_text).toordinal())
+
+    def history(self, key):
+        """某計劃的 CheckinBits，沒有記錄時為 None"""
+        return self._index.get(key)
+
+    def set_origin(self, key, start):
+        """以計劃的建立日（序數）作為位元的起始日"""
+        bits = self._index.get(key)
+        if bits is None:
+            self._index[key] = CheckinBits(start)
+        else:
+            bits.rebase(start)
+
+    def keys(self):
+        """目前有記錄的計劃（需先呼叫 refresh）"""
+        return list(self._index)
+
+    def entries(self):
+        """逐筆列出 (計劃, 日期)"""
+        for key, bits in self._index.items():
+            for date_text in bits.dates():
+                yield key, date_text
+
+    def export_dates(self):
+        """轉回舊版格式 {計劃: [日期, ...]}"""
+        return {key: bits.dates() for key, bits in self._index.items()}
+
+    def add(self, key, date_text):
+        """新增一筆記錄並附加到 journal，已存在則回傳 False"""
+        self.refresh()
+        day = date.fromisoformat(date_text).toordinal()
+        if not self._bits(self._index, key, day).add(day):
+            return False
+        with self._lock:
+            self._pending.append((key, day))
+        if self.writer is not None:
+            self.writer.schedule(self.journal_path, self._write_pending)
+        else:
+            self._write_pending()
+        return True
+
+    def drop(self, key):
+        """刪除某計劃的所有記錄，在 journal 附加一筆刪除記錄"""
+        self.refresh()
+        self._index.pop(key, None)
+        with self._lock:
+            self._pending.append((key, None))
+        if self.writer is not None:
+            self.writer.schedule(self.journal_path, self._write_pending)
+        else:
+            self._write_pending()
+
+    def add_many(self, records):
+        """一次新增多筆 (計劃, 日期) 並附加到 journal，回傳新增的筆數"""
+        self.refresh()
+        added = []
+        for key, date_text in records:
+            day = date.fromisoformat(date_text).toordinal()
+            if self._bits(self._index, key, day).add(day):
+                added.append((key, day))
+        if added:
+            with self._lock:
+                self._pending.extend(added)
+            self._write_pending()
+        return len(added)
+
+    def _write_pending(self):
+        with self._lock:
+            if not self._pending:
+                return
+            with open(self.journal_path, "a", encoding="utf-8") as file:
+                for key, day in self._pending:
+                    if day is None:
+                        record = {"key": key, "deleted": True}
+                    else:
+                        record = {"key": key, "date": date.fromordinal(day).isoformat()}
+                    file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._pending = []
+            self._stamp = self._stat()
+
+    def compact(self):
+        """把 journal 併入 log.json 快照後清空 journal"""
+        self._write_pending()
+        self.refresh()
+        with self._lock:
+            if os.path.exists(self.journal_path):
+                self._write_snapshot()
+
+    def rekey(self, mapping, save=True):
+        """依 {舊 key: [新 key, ...]} 改寫索引，沒有對應的舊 key 會被捨棄
+
+        save 為 False 時只改記憶體中的索引（例如匯入其他後端時）。
+        """
+        self._write_pending()
+        self.refresh()
+        with self._lock:
+            index = {}
+            for key, bits in self._index.items():
+                for new_key in mapping.get(key, ()):
+                    target = index.get(new_key)
+                    if target is None:
+                        index[new_key] = CheckinBits.from_dict(bits.to_dict())
+                    else:
+                        for date_text in bits.dates():
+                            target.add(date.fromisoformat(date_text).toordinal())
+            self._index = index
+            if save:
+                self._write_snapshot()
+
+    def save(self):
+        """把記憶體中的索引寫成快照（例如 rekey(save=False) 之後）"""
+        self._write_pending()
+        with self._lock:
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        log_data = {
+            "version": LOG_VERSION,
+            "history": {key: bits.to_dict() for key, bits in self._index.items()}
+        }
+        write_json_atomic(self.path, log_data, ensure_ascii=False)
+        # 快照已寫入才移除 journal，中途當機重播也不會重複記錄
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        self._stamp = self._stat()
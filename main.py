@@ -1,87 +1,179 @@
+import time
+STARTUP_TIMES = {}  # 啟動各階段耗時（秒）
+_started = time.perf_counter()
+
 from kivy.app import App
 from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.label import Label
 from kivy.uix.textinput import TextInput
 from kivy.uix.button import Button
-from kivy.uix.scrollview import ScrollView
-from kivy.uix.gridlayout import GridLayout
 from kivy.uix.checkbox import CheckBox
 from kivy.uix.screenmanager import ScreenManager, Screen
-from kivy.core.text import LabelBase
 from kivy.uix.popup import Popup
 from kivy.clock import Clock
-from kivy.uix.colorpicker import ColorPicker
-from kivy.uix.progressbar import ProgressBar
-from kivy.core.audio import SoundLoader
-from kivy.uix.filechooser import FileChooserListView
+from kivy.logger import Logger
+# ColorPicker、FileChooserListView、SoundLoader、ProgressBar 在第一次使用時才匯入
 
 
-import json
 import os
-from datetime import datetime
-import re
+from datetime import date, datetime, timedelta
+import math
 import random
+
+from plan_model import COMPLETED, PENDING, Frequency
+from storage import open_store
+from study_core import StudyCore, plan_row, progress_row, validate_date
+from fonts import INPUT_FONT_NAME, CachedButton, DynamicLabel, TEXTURE_CACHE, register_fonts, use_subset
+from tick_service import TickService
+from timer_engine import TimerEngine
+from popups import PopupManager
+from profiling import PROFILER
+STARTUP_TIMES["import"] = time.perf_counter() - _started
+
 # 註冊繁體中文字體
-LabelBase.register(name='NotoSerifCJKtc',
-                   fn_regular=r'10_NotoSerifCJKtc\OTF\TraditionalChinese\NotoSerifCJKtc-Regular.otf')
+_font_started = time.perf_counter()
+register_fonts()
+STARTUP_TIMES["font"] = time.perf_counter() - _font_started
+
+# STUDY_PROFILE=1 時計時的方法（另外還有所有 build 開頭的方法）
+PROFILED_METHODS = (
+    "load_data", "save_log", "update_time", "update_timer", "switch_screen",
+    "update_plan_list", "update_progress_list", "update_stats", "prepare_stats", "load_archive_page",
+    "complete_daily_progress", "add_plan", "delete_plan", "show_time_up_popup", "show_music_tracks",
+    "import_files", "export_files", "apply_plan_filter"
+)
+PROFILED_STORE_METHODS = (
+    "load_plans", "save_plans", "flush", "add_log", "refresh_log", "has_log", "history", "histories",
+    "archive_plans", "load_archive", "import_plans", "import_logs"
+)
+
+ARCHIVE_PAGE_SIZE = 50  # 歷史計劃每次讀取的筆數
+SEARCH_DELAY = 0.3  # 停止輸入多久後才搜尋（秒）
+NO_PLANS_TEXT = "目前沒有建立的學習計劃，請至新建計劃頁面建立。"
+
+# 檢視計劃的篩選按鈕：名稱 -> (標題, ((顯示文字, 值), ...))，每按一次換下一個選項
+PLAN_FILTERS = {
+    "status": ("狀態", (("進行中", PENDING), ("已完成", COMPLETED), ("全部", None))),
+    "frequency": ("週期", (("全部", None), ("每日", Frequency.DAILY), ("每周", Frequency.WEEKLY))),
+    "sort": ("排序", (("加入順序", False), ("到期日", True))),
+}
+
+# 時間到時的題目和答案列表
+TIME_UP_QUESTIONS = [
+    ("123.45 + 67.89 - 45.67 =", 145.67),
+    ("456.7 × 1.2 + 78.56 =", 626.6),
+    ("789.01 - 123.45 + 67.89 =", 733.45),
+    ("234.56 + 78.9 × 1.1 =", 321.35),
+    ("567.89 - 45 × 2.3 =", 464.39),
+    ("123.45 + 456 × 0.89 =", 529.29),
+    ("78.9 × 4.5 - 67.89 =", 287.16),
+    ("345.67 - 78.91 + 123.45 =", 390.21),
+    ("567.8 × 0.6 + 45.67 =", 386.35),
+    ("23.4 × 9.61 - 44.134 =", 180.74)
+]
 
 class StudyHelperApp(App):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        self.data_file = "study_data.json"
-        self.log_file = "study_log.json"
-        self.plans = []  # 存儲學習計畫
+        if PROFILER.enabled:
+            self.instrument()
+        load_started = time.perf_counter()
+        self.store = open_store()  # 儲存後端 (STUDY_STORAGE=sqlite/json)
+        PROFILER.instrument(self.store, PROFILED_STORE_METHODS, "io")
+        PROFILER.instrument(self.store.writer, ("_drain",), "io")  # 背景執行緒的寫檔
+        self.plans = {}  # 存儲學習計畫 {id: plan}
         self.load_data()  # 載入資料
+        STARTUP_TIMES["load"] = time.perf_counter() - load_started
+        subset_started = time.perf_counter()
+        if use_subset(plan.name for plan in self.plans.values()):  # STUDY_FONT_SUBSET=1 時只載入用得到的字
+            STARTUP_TIMES["font_subset"] = time.perf_counter() - subset_started
         self.current_time_label = None  
         self.text_color = (1, 0.5, 0.5, 1)
         self.remaining_time = 0
+        self.timers = TimerEngine(Clock.schedule_once)  # 以 monotonic 截止時間計時，暫停不漂移
+        self.ticks = TickService(Clock.schedule_once)  # 每秒更新共用一次喚醒
+        PROFILER.instrument(self.timers, ("_on_event",), "clock")
+        PROFILER.instrument(self.ticks, ("_tick",), "clock")
         self.started=False # 是否已經計時
         self.selected_music = None  
         self.music_player = None 
-
-    def save_data(self):
-        data = {"plans": self.plans}
-        with open(self.data_file, "w") as file:
-            json.dump(data, file)
+        self.popups = PopupManager()  # 對話框第一次開啟時才建立，之後重複使用
+        self.popups.register("error", self.build_error_popup)
+        self.popups.register("time_up", self.build_time_up_popup)
+        self.popups.register("color", self.build_color_popup)
+        self.popups.register("music", self.build_music_popup)
+        self.popups.register("transfer", self.build_transfer_popup)
+        self.sounds = None  # 鬧鐘音樂快取，第一次選擇音樂時建立
+        self.stats = None  # 學習統計，第一次開啟統計頁時建立（見 prepare_stats）
+        self.alarm_deadline = None  # 鬧鐘的截止時間 (monotonic)，用來記錄播放延遲
+        self.day_event = None  # 下一個午夜的換日事件
+        self.current_day = date.today()  # 最近一次處理換日時的日期
 
     def load_data(self):
-        if os.path.exists(self.data_file):
-            with open(self.data_file, "r") as file:
-                try:
-                    data = json.load(file)
-                    self.plans = data.get("plans", [])
-                except json.JSONDecodeError:
-                    self.plans = []
-                    self.save_data()
-        else:
-            self.plans = []
-            self.save_data()
+        self.core = StudyCore(self.store)  # 計劃與簽到的邏輯，與命令列工具共用
+        self.model = self.core.model
+        self.plans = self.core.plans
 
     def save_log(self, plan):
-        log_file = "log.json"
-        if not os.path.exists(log_file):
-            log_data = {}
+        """記錄今日完成，回傳是否為新的記錄"""
+        return self.core.save_log(plan)
+
+    def on_pause(self):
+        self.store.flush()  # 進入背景前把待寫資料寫入
+        self.ticks.pause()  # 背景中不更新畫面
+        return True
+
+    def on_resume(self):
+        self.ticks.resume()
+        # Clock 在休眠時停止，午夜的事件會延後：回來時自行檢查是否已換日
+        if date.today() != self.current_day:
+            self.on_day_change(0)
         else:
-            with open(log_file, "r") as file:
-                try:
-                    log_data = json.load(file)
-                except json.JSONDecodeError:
-                    log_data = {}
-
-        # 獲取今日日期
-        today = datetime.now().strftime("%Y-%m-%d")
-
-        # 更新LOG
-        if plan["name"] not in log_data:
-            log_data[plan["name"]] = []
-        if today not in log_data[plan["name"]]:
-            log_data[plan["name"]].append(today)
-
-        # 保存LOG
-        with open(log_file, "w") as file:
-            json.dump(log_data, file, ensure_ascii=False, indent=4)
+            self.schedule_day_change()
+
+    def on_start(self):
+        from kivy.core.window import Window
+
+        def first_frame(*args):
+            Window.unbind(on_flip=first_frame)
+            STARTUP_TIMES["first_frame"] = time.perf_counter() - _started
+            Logger.info("StudyHelper: startup " + ", ".join(
+                f"{name} {seconds * 1000:.0f} ms" for name, seconds in STARTUP_TIMES.items()))
+
+        Window.bind(on_flip=first_frame)
+
+    def instrument(self):
+        """STUDY_PROFILE=1：替主要方法與文字繪製加上計時"""
+        names = PROFILED_METHODS + tuple(name for name in dir(type(self)) if name.startswith("build"))
+        PROFILER.instrument(self, names)
+        PROFILER.instrument_class(Label, ("texture_update",), "font")
+
+    def update_profile_overlay(self, now):
+        """每秒顯示最近一秒的畫格數、掉幀數與耗時最多的項目"""
+        frames, slow, stats = PROFILER.take_window()
+        top = sorted(stats.items(), key=lambda item: item[1].total, reverse=True)[:3]
+        self.profile_label.text = f"{frames} fps, {slow} 掉幀 | " + " | ".join(
+            f"{name} {stat.count}x {stat.total / stat.count / 1e6:.1f}/{stat.max / 1e6:.1f} ms"
+            for name, stat in top)
+
+    def on_stop(self):
+        from widgets import ListRow
+        Logger.info("StudyHelper: list rows %s", ListRow.stats())
+        Logger.info("StudyHelper: text textures hits=%d misses=%d", TEXTURE_CACHE.hits, TEXTURE_CACHE.misses)
+        Logger.info("StudyHelper: ticks total=%d last minute=%d", self.ticks.wakeups, self.ticks.wakeups_per_minute())
+        Logger.info("StudyHelper: popups (constructed, reused) %s", self.popups.stats())
+        if self.sounds is not None:
+            Logger.info("StudyHelper: sounds hits=%d misses=%d", self.sounds.hits, self.sounds.misses)
+        self.store.close()
+        if PROFILER.enabled:
+            for name, count, total, longest in PROFILER.summary():
+                Logger.info(f"Profile: {name} {count}x total {total:.1f} ms max {longest:.1f} ms")
+            Logger.info(f"Profile: {PROFILER.slow_frames}/{PROFILER.frames} frames over budget")
+            trace_path = os.environ.get("STUDY_PROFILE_TRACE", "study_trace.json")
+            Logger.info(f"Profile: wrote {PROFILER.dump(trace_path)} events to {trace_path}")
 
     def build(self):
+        build_started = time.perf_counter()
 
         self.sm = ScreenManager()
 
@@ -93,19 +185,48 @@ class StudyHelperApp(App):
             valign="middle",
             size_hint=(1, 0.1)
         )
-        Clock.schedule_interval(self.update_time, 1)  # 每秒更新時間
+        self.ticks.subscribe("clock", self.update_time, screen="plans")  # 只在第一頁顯示時更新時間
+
+        # 其他頁面在第一次切換過去時才建立
+        self.add_screen(self.build_plans_screen())
+        self.schedule_day_change()
+
+        nav_layout = BoxLayout(size_hint=(1, 0.1))
+        btn_plan = Button(text="學習計劃", on_press=lambda x: self.switch_screen("plans"), font_name="NotoSerifCJKtc")
+        btn_progress = Button(text="今日進度", on_press=lambda x: self.switch_screen("progress"), font_name="NotoSerifCJKtc")
+        btn_asain = Button(text="亞洲鬧鐘", on_press=lambda x: self.switch_screen("asain"), font_name="NotoSerifCJKtc")
+        nav_layout.add_widget(btn_plan)
+        nav_layout.add_widget(btn_progress)
+        btn_stats = Button(text="學習統計", on_press=lambda x: self.switch_screen("stats"), font_name="NotoSerifCJKtc")
+        nav_layout.add_widget(btn_asain)
+        nav_layout.add_widget(btn_stats)
+        main_layout = BoxLayout(orientation='vertical')
+        if PROFILER.enabled:
+            # 效能資訊列：最近一秒的畫格與耗時
+            self.profile_label = Label(font_name="NotoSerifCJKtc", font_size="12sp", size_hint=(1, 0.05))
+            main_layout.add_widget(self.profile_label)
+            Clock.schedule_interval(PROFILER.record_frame, 0)  # 每個畫格記錄一次間隔
+            self.ticks.subscribe("profile", self.update_profile_overlay)
+        
+        main_layout.add_widget(self.sm)
+        main_layout.add_widget(nav_layout)
+
+        STARTUP_TIMES["build"] = time.perf_counter() - build_started
+        return main_layout
 
-        # 第一頁：學習計劃管理
+    def build_plans_screen(self):
+        """第一頁：學習計劃管理"""
         plan_screen = Screen(name="plans")
         plan_layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
 
 
         plan_layout.add_widget(self.current_time_label)
 
-        self.plan_input = TextInput(hint_text="輸入學習計劃名稱...", multiline=False, font_name="NotoSerifCJKtc")
-        self.due_date_input = TextInput(hint_text="輸入截止日期 (YYYY-MM-DD)...", multiline=False, font_name="NotoSerifCJKtc")
+        self.plan_input = TextInput(hint_text="輸入學習計劃名稱...", multiline=False, font_name=INPUT_FONT_NAME)
+        self.due_date_input = TextInput(hint_text="輸入截止日期 (YYYY-MM-DD)...", multiline=False, font_name=INPUT_FONT_NAME)
         add_plan_button = Button(text="新增計劃", on_press=self.add_plan, font_name="NotoSerifCJKtc", size_hint=(1, 0.3))
         view_plans_button = Button(text="檢視計劃", on_press=lambda x: self.switch_screen("view_plans"), font_name="NotoSerifCJKtc", size_hint=(1, 0.3))
+        transfer_button = Button(text="匯入/匯出", on_press=lambda x: self.popups.open("transfer"), font_name="NotoSerifCJKtc", size_hint=(1, 0.3))
 
         self.daily_checkbox = CheckBox()
         self.weekly_checkbox = CheckBox()
@@ -125,51 +246,137 @@ class StudyHelperApp(App):
         plan_layout.add_widget(checkbox_layout)
         plan_layout.add_widget(add_plan_button)
         plan_layout.add_widget(view_plans_button)
+        plan_layout.add_widget(transfer_button)
 
         plan_screen.add_widget(plan_layout)
-        self.sm.add_widget(plan_screen)
+        return plan_screen
+
+    def build_view_plans_screen(self):
+        """第二頁：檢視計劃"""
+        from plan_search import PlanFilter, PlanIndex
+        from widgets import ModelListBinding, make_recycle_list
 
-        # 第二頁：檢視計劃
         view_plans_screen = Screen(name="view_plans")
         view_plans_layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
 
-        self.plan_list = GridLayout(cols=1, size_hint_y=None)
-        self.plan_list.bind(minimum_height=self.plan_list.setter('height'))
+        # 搜尋與篩選：停止輸入 SEARCH_DELAY 秒後才查詢索引
+        self.plan_index = PlanIndex(self.plans.values())
+        self.model.bind(self.plan_index)  # 新增/刪除時只更新索引中的這個計劃
+        self.plan_filter = PlanFilter(status=PENDING)
+        self.search_event = Clock.create_trigger(self.apply_plan_filter, SEARCH_DELAY)
+        self.search_input = TextInput(hint_text="搜尋計劃...", multiline=False, font_name=INPUT_FONT_NAME)
+        self.due_from_input = TextInput(hint_text="到期日起 YYYY-MM-DD", multiline=False, font_name=INPUT_FONT_NAME)
+        self.due_to_input = TextInput(hint_text="到期日迄 YYYY-MM-DD", multiline=False, font_name=INPUT_FONT_NAME)
+        search_layout = BoxLayout(size_hint=(1, 0.08), spacing=5)
+        for text_input in (self.search_input, self.due_from_input, self.due_to_input):
+            text_input.bind(text=lambda instance, value: self.schedule_search())
+            search_layout.add_widget(text_input)
+        view_plans_layout.add_widget(search_layout)
+
+        self.filter_choices = dict.fromkeys(PLAN_FILTERS, 0)  # 名稱 -> 目前選項的位置
+        self.filter_buttons = {}
+        filter_layout = BoxLayout(size_hint=(1, 0.08), spacing=5)
+        for name, (title, options) in PLAN_FILTERS.items():
+            button = CachedButton(text=f"{title}: {options[0][0]}", font_name="NotoSerifCJKtc",
+                                  on_press=lambda x, name=name: self.next_filter(name))
+            self.filter_buttons[name] = button
+            filter_layout.add_widget(button)
+        view_plans_layout.add_widget(filter_layout)
+
+        self.plan_list = make_recycle_list(size_hint=(1, 0.64))  # 只建立畫面上看得到的列
+        self.plan_binding = ModelListBinding(
+            self.plan_list, self.plan_row,
+            accept=lambda plan: self.plan_filter.matches(plan),
+            empty_text=NO_PLANS_TEXT,
+            key=lambda plan: self.plan_filter.sort_key(plan)
+        )
+        self.model.bind(self.plan_binding)  # 新增/刪除時只更新變動的列
         self.update_plan_list()
-        plan_scroll = ScrollView(size_hint=(1, 0.8))  
-        plan_scroll.add_widget(self.plan_list)
-        view_plans_layout.add_widget(plan_scroll)
+        view_plans_layout.add_widget(self.plan_list)
 
-        back_button = Button(text="返回", on_press=lambda x: self.switch_screen("plans"), font_name="NotoSerifCJKtc",size_hint=(1, 0.2))
+        archive_button = CachedButton(text="歷史計劃", on_press=lambda x: self.switch_screen("archive"), font_name="NotoSerifCJKtc",size_hint=(1, 0.1))
+        view_plans_layout.add_widget(archive_button)
+        back_button = CachedButton(text="返回", on_press=lambda x: self.switch_screen("plans"), font_name="NotoSerifCJKtc",size_hint=(1, 0.1))
         view_plans_layout.add_widget(back_button)
 
         view_plans_screen.add_widget(view_plans_layout)
-        self.sm.add_widget(view_plans_screen)
+        return view_plans_screen
+
+    def build_archive_screen(self):
+        """歷史計劃：已完成的計劃，開啟時才從封存分頁讀取"""
+        from widgets import make_recycle_list
+
+        archive_screen = Screen(name="archive")
+        archive_layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
+
+        self.archive_list = make_recycle_list(size_hint=(1, 0.8))
+        archive_layout.add_widget(self.archive_list)
+
+        back_button = CachedButton(text="返回", on_press=lambda x: self.switch_screen("view_plans"), font_name="NotoSerifCJKtc",size_hint=(1, 0.2))
+        archive_layout.add_widget(back_button)
+
+        archive_screen.add_widget(archive_layout)
+        return archive_screen
+
+    def prepare_stats(self):
+        """建立統計並由簽到記錄計算，之後只做增量更新；沒開啟統計頁就不讀取全部記錄"""
+        from stats import StatsModel
+
+        if self.stats is None:
+            self.stats = StatsModel(self.model)
+            self.model.bind(self.stats)  # 新增/移除計劃時同步更新
+        self.stats.ensure(date.today().toordinal())
+
+    def build_stats_screen(self):
+        """學習統計：連續天數、近 7 天完成率與熱圖"""
+        from widgets import Heatmap, make_recycle_list
+
+        self.prepare_stats()
+
+        stats_screen = Screen(name="stats")
+        stats_layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
+
+        self.stats_label = DynamicLabel(font_name="NotoSerifCJKtc", size_hint=(1, 0.15))  # 包含計劃名稱
+        stats_layout.add_widget(self.stats_label)
+        self.heatmap = Heatmap(size_hint=(1, 0.3))
+        stats_layout.add_widget(self.heatmap)
+        self.stats_list = make_recycle_list(size_hint=(1, 0.55))
+        stats_layout.add_widget(self.stats_list)
+
+        stats_screen.add_widget(stats_layout)
+        return stats_screen
+
+    def build_progress_screen(self):
+        """第三頁：今日進度"""
+        from widgets import ModelListBinding, make_recycle_list
 
-        # 第三頁：今日進度
         progress_screen = Screen(name="progress")
         progress_layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
 
-        self.progress_list = GridLayout(cols=1, size_hint_y=None)
-        self.progress_list.bind(minimum_height=self.progress_list.setter('height'))
+        self.progress_list = make_recycle_list(size_hint=(1, 0.8))
+        self.progress_binding = ModelListBinding(self.progress_list, self.progress_row, accept=self.is_due_today)
+        self.model.bind(self.progress_binding)
+        self.progress_day = None
         self.update_progress_list()
-        progress_scroll = ScrollView(size_hint=(1, 0.8))
-        progress_scroll.add_widget(self.progress_list)
-        progress_layout.add_widget(progress_scroll)
+        progress_layout.add_widget(self.progress_list)
 
-        back_to_main_button = Button(text="返回", on_press=lambda x: self.switch_screen("plans"), font_name="NotoSerifCJKtc",size_hint=(1, 0.2))
+        back_to_main_button = CachedButton(text="返回", on_press=lambda x: self.switch_screen("plans"), font_name="NotoSerifCJKtc",size_hint=(1, 0.2))
         progress_layout.add_widget(back_to_main_button)
 
         progress_screen.add_widget(progress_layout)
-        self.sm.add_widget(progress_screen)
+        return progress_screen
+
+    def build_asain_screen(self):
+        """第四頁：亞洲鬧鐘"""
+        from kivy.uix.progressbar import ProgressBar
+        from widgets import TimerDisplay
 
-        # 第四頁：亞洲鬧鐘
         asain_screen = Screen(name="asain")
         asain_layout = BoxLayout(orientation='vertical', padding=10, spacing=10)
 
         timer_input_layout = BoxLayout(orientation='horizontal', size_hint=(1, 0.2), spacing=10,pos_hint={'top': 1})
-        self.minutes_input = TextInput(hint_text="分鐘", multiline=False, input_filter='int', font_name="NotoSerifCJKtc",size_hint=(1, 0.5))
-        self.seconds_input = TextInput(hint_text="秒數", multiline=False, input_filter='int', font_name="NotoSerifCJKtc",size_hint=(1, 0.5))
+        self.minutes_input = TextInput(hint_text="分鐘", multiline=False, input_filter='int', font_name=INPUT_FONT_NAME,size_hint=(1, 0.5))
+        self.seconds_input = TextInput(hint_text="秒數", multiline=False, input_filter='int', font_name=INPUT_FONT_NAME,size_hint=(1, 0.5))
         start_timer_button = Button(text="開始計時", font_name="NotoSerifCJKtc", on_press=self.start_timer,size_hint=(1, 0.5),background_color=(0.13, 0.55, 0.13, 1.0),background_normal='')
 
         timer_input_layout.add_widget(self.minutes_input)
@@ -193,11 +400,10 @@ class StudyHelperApp(App):
             height=40
         )
 
-        self.timer_label = Label(
+        self.timer_label = TimerDisplay(  # 每秒只替換數字貼圖
             text="00:00",
             font_name="NotoSerifCJKtc",
             font_size="48sp",
-            halign="center",
             size_hint=(1, 0.3),
             color=self.text_color
         )
@@ -219,7 +425,7 @@ class StudyHelperApp(App):
         asain_layout.add_widget(self.status_label)
         
 
-        back_to_main_button = Button(text="返回", on_press=lambda x: self.switch_screen("plans"), font_name="NotoSerifCJKtc", size_hint=(1, 0.5))
+        back_to_main_button = CachedButton(text="返回", on_press=lambda x: self.switch_screen("plans"), font_name="NotoSerifCJKtc", size_hint=(1, 0.5))
         color_button = Button(
             text="顏色",
             font_name="NotoSerifCJKtc",
@@ -248,57 +454,73 @@ class StudyHelperApp(App):
         button_layout.add_widget(back_to_main_button)
         asain_layout.add_widget(button_layout)
         asain_screen.add_widget(asain_layout)
-        self.sm.add_widget(asain_screen)
-
-    
-        nav_layout = BoxLayout(size_hint=(1, 0.1))
-        btn_plan = Button(text="學習計劃", on_press=lambda x: self.switch_screen("plans"), font_name="NotoSerifCJKtc")
-        btn_progress = Button(text="今日進度", on_press=lambda x: self.switch_screen("progress"), font_name="NotoSerifCJKtc")
-        btn_asain = Button(text="亞洲鬧鐘", on_press=lambda x: self.switch_screen("asain"), font_name="NotoSerifCJKtc")
-        nav_layout.add_widget(btn_plan)
-        nav_layout.add_widget(btn_progress)
-        nav_layout.add_widget(btn_asain)
-        main_layout = BoxLayout(orientation='vertical')
-        
-        main_layout.add_widget(self.sm)
-        main_layout.add_widget(nav_layout)
+        return asain_screen
 
-        return main_layout
-    
     def get_current_time(self):
         """獲取當前時間的字串格式"""
         return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-    def update_time(self, dt):
+    def update_time(self, now):
         """更新時間 Label 的文字"""
         self.current_time_label.text = self.get_current_time()
 
+    def add_screen(self, screen):
+        """加入頁面，並讓計時服務知道頁面是否顯示"""
+        screen.bind(on_enter=lambda s: self.ticks.screen_entered(s.name),
+                    on_leave=lambda s: self.ticks.screen_left(s.name))
+        self.sm.add_widget(screen)
+
     def switch_screen(self, screen_name):
+        if not self.sm.has_screen(screen_name):
+            # 第一次切換時才建立頁面
+            self.add_screen(getattr(self, f"build_{screen_name}_screen")())
         self.sm.current = screen_name
-        if screen_name == "view_plans":
-            self.update_plan_list()  
-        elif screen_name == "progress":
-            self.update_progress_list()  
+        if screen_name == "progress" and self.progress_day != date.today():
+            self.update_progress_list()  # 換日才需要重建
+        elif screen_name == "archive":
+            self.load_archive_page(reset=True)
+        elif screen_name == "stats":
+            self.update_stats()
+
+    def schedule_day_change(self):
+        """在下一個午夜觸發換日處理（取代先前排定的事件）"""
+        if self.day_event is not None:
+            self.day_event.cancel()
+        now = datetime.now()
+        self.current_day = now.date()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        self.day_event = Clock.schedule_once(self.on_day_change, (midnight - now).total_seconds() + 1)
+
+    def on_day_change(self, dt):
+        """換日：只處理過期的計劃並重建今日進度"""
+        self.model.expire_overdue(date.today())
+        if self.sm.has_screen("progress"):
+            self.update_progress_list()
+        if self.sm.current == "stats":
+            self.update_stats()  # 統計換日後重新計算
+        self.schedule_day_change()
 
     def validate_date(self, date_text):
         """驗證日期格式"""
-        if not re.match(r"^\d{4}-\d{2}-\d{2}$", date_text):
-            return False
-        try:
-            datetime.strptime(date_text, "%Y-%m-%d")
-            return True
-        except ValueError:
-            return False
+        return validate_date(date_text)
 
     def show_error_popup(self, message):
         """顯示錯誤彈窗"""
+        self.popups.open("error", message)
+
+    def build_error_popup(self):
         content = BoxLayout(orientation='vertical', padding=10, spacing=10)
-        content.add_widget(Label(text=message, font_name="NotoSerifCJKtc"))
+        message_label = DynamicLabel(font_name="NotoSerifCJKtc")
+        content.add_widget(message_label)
         close_button = Button(text="關閉", size_hint=(1, 0.3), font_name="NotoSerifCJKtc")
         popup = Popup(title="ERROR!", content=content, size_hint=(0.7, 0.4))
         close_button.bind(on_press=popup.dismiss)
         content.add_widget(close_button)
-        popup.open()
+
+        def reset(message):
+            message_label.text = message
+
+        return popup, reset
 
     def add_plan(self, instance):
         """新增學習計劃"""
@@ -307,142 +529,185 @@ class StudyHelperApp(App):
         daily = self.daily_checkbox.active
         weekly = self.weekly_checkbox.active
 
-        if not name:
-            self.show_error_popup("請輸入學習計劃名稱！")
-            return
-
-        if not self.validate_date(due_date):
-            self.show_error_popup("日期格式錯誤！請輸入 YYYY-MM-DD。")
-            return
-
-        if not (daily or weekly):
-            self.show_error_popup("請選擇每日或每周計劃！")
-            return
-        
-        input_date = datetime.strptime(due_date, "%Y-%m-%d").date()
-        today = datetime.now().date()  
-
-        if input_date < today:
-            self.show_error_popup("不要當時空旅人")
+        try:
+            self.core.add_plan(name, due_date, daily, weekly)
+        except ValueError as error:
+            self.show_error_popup(str(error))
             return
-        create_date = today.strftime("%Y-%m-%d")
-        self.plans.append({
-            "name": name,
-            "due_date": due_date,
-            "daily": daily,
-            "weekly": weekly,
-            "create_date": create_date, 
-            "status": "Pending"
-        })
-        self.save_data()
-        self.update_plan_list()
         self.plan_input.text = ""
         self.due_date_input.text = ""
         self.daily_checkbox.active = False
         self.weekly_checkbox.active = False
 
+    def build_transfer_popup(self):
+        """匯入/匯出計劃與簽到記錄 (CSV/JSONL)"""
+        content = BoxLayout(orientation='vertical', padding=10, spacing=10)
+        plans_input = TextInput(hint_text="計劃檔 (.csv/.jsonl)...", multiline=False, font_name=INPUT_FONT_NAME)
+        history_input = TextInput(hint_text="簽到記錄檔 (.csv/.jsonl，可留空)...", multiline=False, font_name=INPUT_FONT_NAME)
+        self.transfer_label = DynamicLabel(font_name="NotoSerifCJKtc", size_hint=(1, 2))  # 檔案路徑與匯入錯誤
+        buttons = BoxLayout(spacing=10)
+        buttons.add_widget(Button(text="匯入", font_name="NotoSerifCJKtc",
+                                  on_press=lambda x: self.import_files(plans_input.text.strip(), history_input.text.strip())))
+        buttons.add_widget(Button(text="匯出", font_name="NotoSerifCJKtc",
+                                  on_press=lambda x: self.export_files(plans_input.text.strip(), history_input.text.strip())))
+        close_button = Button(text="關閉", font_name="NotoSerifCJKtc")
+        buttons.add_widget(close_button)
+        for widget in (plans_input, history_input, self.transfer_label, buttons):
+            content.add_widget(widget)
+        popup = Popup(title="IMPORT / EXPORT", content=content, size_hint=(0.9, 0.7))
+        close_button.bind(on_press=popup.dismiss)
+
+        def reset():
+            self.transfer_label.text = ""
+
+        return popup, reset
+
+    def import_files(self, plans_path, history_path):
+        """匯入計劃與簽到記錄：整個檔案只寫入一次，清單在最後一次更新"""
+        from study_io import import_history, import_plans
+
+        lines = []
+        try:
+            id_map = None
+            if plans_path:
+                result = import_plans(self.model, plans_path)
+                lines.append(f"計劃: {result.summary()}")
+                lines.extend(f"第 {row} 列: {message}" for row, message in result.errors[:3])
+                id_map = result.id_map
+            if history_path:
+                result = import_history(self.store, history_path, id_map)
+                lines.append(f"簽到記錄: {result.summary()}")
+                lines.extend(f"第 {row} 列: {message}" for row, message in result.errors[:3])
+                if self.stats is not None:
+                    self.stats.invalidate()  # 下次開啟統計頁時重新計算
+                if self.sm.has_screen("progress"):
+                    self.progress_day = None  # 下次開啟今日進度時重建
+        except (OSError, ValueError) as error:
+            lines.append(str(error))
+        self.transfer_label.text = "\n".join(lines) or "請輸入檔案路徑"
+
+    def export_files(self, plans_path, history_path):
+        """匯出計劃與簽到記錄，副檔名決定格式"""
+        from study_io import export_history, export_plans
+
+        lines = []
+        try:
+            if plans_path:
+                lines.append(f"計劃: {export_plans(self.model, plans_path)} 筆")
+            if history_path:
+                lines.append(f"簽到記錄: {export_history(self.store, history_path)} 筆")
+        except (OSError, ValueError) as error:
+            lines.append(str(error))
+        self.transfer_label.text = "\n".join(lines) or "請輸入檔案路徑"
+
     def update_plan_list(self):
-        """更新計劃清單"""
-        self.plan_list.clear_widgets()
-        today = datetime.now().date()  
-
-        for plan in self.plans:
-            due_date = datetime.strptime(plan['due_date'], "%Y-%m-%d").date()
-            if due_date < today and plan['status'] != "Completed":
-                plan['status'] = "Completed"
-
-        self.save_data()
-
-        if not self.plans:
-            no_plan_label = Label(
-                text="目前沒有建立的學習計劃，請至新建計劃頁面建立。",
-                font_name="NotoSerifCJKtc",
-                size_hint_y=None,
-                height=40
-            )
-            self.plan_list.add_widget(no_plan_label)
-            return
+        """更新計劃清單（符合目前的搜尋與篩選條件）"""
+        self.plan_binding.reset(self.plan_index.query(self.plan_filter))
+
+    def schedule_search(self):
+        """重新開始計時，連續輸入時只在停止後查詢一次"""
+        self.search_event.cancel()
+        self.search_event()
+
+    def next_filter(self, name):
+        title, options = PLAN_FILTERS[name]
+        choice = self.filter_choices[name] = (self.filter_choices[name] + 1) % len(options)
+        self.filter_buttons[name].text = f"{title}: {options[choice][0]}"
+        self.apply_plan_filter()
+
+    def filter_value(self, name):
+        return PLAN_FILTERS[name][1][self.filter_choices[name]][1]
+
+    def filter_date(self, text_input):
+        """篩選的日期；空白或格式錯誤時不限"""
+        text = text_input.text.strip()
+        return datetime.strptime(text, "%Y-%m-%d").date().toordinal() if validate_date(text) else None
+
+    def apply_plan_filter(self, *args):
+        """依搜尋框與篩選條件重建清單"""
+        from plan_search import PlanFilter
+
+        status = self.filter_value("status")
+        if status != PENDING and not self.plan_index.archive_loaded:
+            # 第一次搜尋已完成的計劃時才讀取封存
+            self.plan_index.load_archive(self.model.archived(0, self.model.archived_count()))
+        self.plan_filter = PlanFilter(
+            self.search_input.text, status, self.filter_value("frequency"),
+            self.filter_date(self.due_from_input), self.filter_date(self.due_to_input), self.filter_value("sort")
+        )
+        filtered = self.plan_filter.text or status != PENDING or self.plan_filter.frequency is not None \
+            or self.plan_filter.due_from is not None or self.plan_filter.due_to is not None
+        self.plan_binding.empty_text = "沒有符合條件的計劃。" if filtered else NO_PLANS_TEXT
+        self.update_plan_list()
+
+    def plan_row(self, plan):
+        """計劃清單中一列的資料"""
+        row = plan_row(plan)
+        if not plan.completed:
+            row["on_press"] = lambda row: self.delete_plan(plan)
+        return row
+
+    def load_archive_page(self, reset=False):
+        """讀取下一頁歷史計劃，還有更多時在最後放一列「載入更多」"""
+        rows = [] if reset else [row for row in self.archive_list.data if "plan" in row]
+        plans = self.model.archived(len(rows), ARCHIVE_PAGE_SIZE + 1)
+        rows.extend(plan_row(plan) for plan in plans[:ARCHIVE_PAGE_SIZE])
+        if len(plans) > ARCHIVE_PAGE_SIZE:
+            rows.append({"text": "", "button_text": "載入更多", "on_press": lambda row: self.load_archive_page()})
+        self.archive_list.data = rows or [{"text": "目前沒有已完成的計劃。"}]
+
+    def update_stats(self, plan=None):
+        """顯示統計；plan 為 None 時熱圖顯示全部計劃"""
+        today = date.today().toordinal()
+        self.stats.ensure(today)  # 只有第一次或換日時才從記錄重新計算
+        overall = self.stats.overall_summary(today)
+        title = f"熱圖: {plan.name}" if plan is not None else "熱圖: 全部計劃"
+        self.stats_label.text = (
+            f"連續 {overall['current']} 天 (最長 {overall['longest']} 天) - "
+            f"近 7 天完成率 {overall['week_rate']:.0%}\n{title}")
+        self.heatmap.set_values(self.stats.heatmap(plan))
+        rows = [{"text": "", "button_text": "全部計劃", "on_press": lambda row: self.update_stats()}]
+        rows.extend(self.stats_row(item, today) for item in self.plans.values())
+        self.stats_list.data = rows
+
+    def stats_row(self, plan, today):
+        summary = self.stats.plan_summary(plan, today)
+        unit = "天" if plan.daily else "週"
+        return {
+            "text": f"{plan.name}: 連續 {summary['current']} {unit} (最長 {summary['longest']} {unit}) - "
+                    f"近 7 天完成率 {summary['week_rate']:.0%}",
+            "button_text": "熱圖",
+            "on_press": lambda row: self.update_stats(plan)
+        }
 
-        for plan in self.plans:
-            frequency = lambda condition: "每日" if plan["daily"] else "每周"
-            plan_label = Label(
-                text=f"{plan['name']} (到期日: {plan['due_date']}) - 狀態: {plan['status']} - 週期: {frequency(plan)}",
-                size_hint_y=None,
-                height=40,
-                font_name="NotoSerifCJKtc"
-            )
-            delete_button = Button(
-                text="刪除",
-                size_hint_y=None,
-                height=40,
-                font_name="NotoSerifCJKtc"
-            )
-            delete_button.bind(on_press=lambda instance, p=plan: self.delete_plan(p))
-            self.plan_list.add_widget(plan_label)
-            self.plan_list.add_widget(delete_button)
-        
     def delete_plan(self, plan):
         """刪除計劃"""
-        self.plans.remove(plan)
-        self.save_data()
-        self.update_plan_list()
+        self.core.delete_plan(plan)
+
     def update_progress_list(self):
         """更新今日進度清單"""
-        self.progress_list.clear_widgets()
-        today = datetime.now().strftime("%Y-%m-%d")  
-
-        for plan in self.plans:
-            if plan["status"] == "Completed":
-                continue  
-            is_daily = plan.get("daily", False)
-            is_weekly_due = (
-                plan.get("weekly", False) and
-                (datetime.now().date() - datetime.strptime(plan["create_date"], "%Y-%m-%d").date()).days % 7 == 0
-            )
-
-            if is_daily or is_weekly_due:
-                signed_today = self.check_log(plan, today)
-
-                progress_label = Label(
-                    text=f"今日進度: {plan['name']}",
-                    size_hint_y=None,
-                    height=40,
-                    font_name="NotoSerifCJKtc"
-                )
-                complete_button = Button(
-                    text="已完成" if signed_today else "完成今日進度",
-                    size_hint_y=None,
-                    height=40,
-                    font_name="NotoSerifCJKtc",
-                    disabled=signed_today  # 禁用按鈕如果已簽到
-                )
-                complete_button.bind(on_press=lambda instance, p=plan, b=complete_button: self.complete_daily_progress(p, b))
-                self.progress_list.add_widget(progress_label)
-                self.progress_list.add_widget(complete_button)
-
-    def check_log(self, plan, today):
-        """檢查 LOG 文件中是否有該計劃的今日記錄"""
-        log_file = "log.json"
-
-
-        if not os.path.exists(log_file):
-            return False
-
-        with open(log_file, "r") as file:
-            try:
-                log_data = json.load(file)
-            except json.JSONDecodeError:
-                return False
+        today = date.today()
+        self.progress_day = today
+        self.progress_binding.reset(self.core.due_today(today))
 
-        plan_logs = log_data.get(plan["name"], [])
-        return today in plan_logs
+    def is_due_today(self, plan):
+        """計劃今天是否需要完成"""
+        return self.core.is_due(plan)
 
+    def progress_row(self, plan):
+        """今日進度清單中一列的資料"""
+        row = progress_row(self.core, plan)
+        row["on_press"] = lambda row: self.complete_daily_progress(plan, row)
+        return row
 
-    def complete_daily_progress(self, plan, button):
+    def complete_daily_progress(self, plan, row):
         """標記今日進度為完成並記錄日誌"""
-        self.save_log(plan)  
-        button.text = "已完成"  
-        button.disabled = True  
+        if self.save_log(plan) and self.stats is not None:
+            self.stats.record(plan, date.today().toordinal())  # 只更新當天的統計
+        # 同時更新資料，這一列被回收重用後仍顯示已完成
+        row.data.update(button_text="已完成", disabled=True)
+        row.button.text = "已完成"  
+        row.button.disabled = True  
 
 
 
@@ -457,92 +722,81 @@ class StudyHelperApp(App):
         """開始計時"""
         try:
             if self.started==False or (self.minutes_input.text!="" and self.seconds_input.text!=""):
-                self.started=True
-                if self.remaining_time > 0:
-                    Clock.unschedule(self.update_timer)
-                    # 顯示停止按鈕
-                    self.stop_timer_button.opacity = 1
-                    self.stop_timer_button.disabled = False
                 minutes = int(self.minutes_input.text) if self.minutes_input.text else 0
                 seconds = int(self.seconds_input.text) if self.seconds_input.text else 0
-                self.remaining_time = minutes * 60 + seconds
-                if self.remaining_time > 0:
-                    self.progress.max = self.remaining_time
-                    self.update_timer_label()
-                    self.timer_event = Clock.schedule_interval(self.update_timer, 1)
-                # 顯示停止按鈕
+                total = minutes * 60 + seconds
+                self.started=True
+                if total > 0:
+                    self.timers.start("study", total, self.on_timer_finished)
+                    self.progress.max = total
+                    self.ticks.subscribe("countdown", self.update_timer, screen="asain")
+                    # 顯示停止按鈕
                     self.stop_timer_button.opacity = 1
                     self.stop_timer_button.disabled = False
                 self.minutes_input.text=""
                 self.seconds_input.text=""
-            elif self.started==True :
-                Clock.unschedule(self.update_timer)
+            elif self.timers.is_paused("study"):
+                self.timers.resume("study")
                 self.is_paused = False
                 self.stop_timer_button.disabled = False
-                if self.remaining_time > 0:
-                    self.progress.max = self.remaining_time
-                    self.update_timer_label()
-                    self.timer_event = Clock.schedule_interval(self.update_timer, 1)
+                self.ticks.subscribe("countdown", self.update_timer, screen="asain")
         except ValueError:
             self.status_label.text = "請輸入有效的時間！"
 
     def stop_timer(self, instance):
-        """停止計時器"""
-        self.timer_event.cancel()
+        """暫停計時器，剩餘時間保留在計時器中"""
+        self.timers.pause("study")
+        self.ticks.unsubscribe("countdown")
         self.is_paused = True
         self.stop_timer_button.disabled = True
-
-    def update_timer(self, dt):
-        """更新倒計時"""
-        if self.remaining_time > 0:
-            self.remaining_time -= 1
-            self.update_timer_label()
-            self.progress.value = self.progress.max - self.remaining_time
-        else:
-            Clock.unschedule(self.update_timer)
-            self.timer_label.text = "時間到！"
-            self.show_time_up_popup()
-            # 隱藏停止按鈕
-            self.stop_timer_button.opacity = 0
-            self.stop_timer_button.disabled = True
-            self.started==False
+        self.update_timer()
+
+    def update_timer(self, now=None):
+        """更新倒計時顯示（由計時服務每秒呼叫，剩餘時間由截止時間換算）"""
+        self.remaining_time = self.timers.remaining("study")
+        self.update_timer_label()
+        self.progress.value = self.progress.max - self.remaining_time
+
+    def on_timer_finished(self, name, late):
+        """計時結束；late 是實際觸發比截止時間晚的秒數"""
+        Logger.info(f"Timer: {name} finished {late * 1000:.1f} ms late")
+        self.alarm_deadline = time.monotonic() - late
+        self.ticks.unsubscribe("countdown")
+        self.remaining_time = 0
+        self.progress.value = self.progress.max
+        self.timer_label.text = "時間到！"
+        self.show_time_up_popup()
+        # 隱藏停止按鈕
+        self.stop_timer_button.opacity = 0
+        self.stop_timer_button.disabled = True
+        self.started = False
 
     def update_timer_label(self):
         """更新計時器顯示"""
-        minutes, seconds = divmod(self.remaining_time, 60)
+        # 由截止時間換算，Clock 提早一點觸發也不會顯示成上一秒
+        minutes, seconds = divmod(max(0, math.ceil(self.remaining_time - 0.05)), 60)
         self.timer_label.text = f"{minutes:02}:{seconds:02}"
     
     def show_time_up_popup(self):
         """顯示隨機題目，並要求使用者輸入正確答案才能關閉彈窗"""
+        if self.selected_music:
+            self.play_selected_music()
+        self.popups.open("time_up", *random.choice(TIME_UP_QUESTIONS))
+
+    def build_time_up_popup(self):
+        state = {"answer": None}
+
         def cls(instance):
             if self.music_player:
                 self.music_player.stop()
             popup.dismiss()
 
-        if self.selected_music:
-            self.play_selected_music()
-
-        # 題目和答案列表
-        questions = [
-            ("123.45 + 67.89 - 45.67 =", 145.67),
-            ("456.7 × 1.2 + 78.56 =", 626.6),
-            ("789.01 - 123.45 + 67.89 =", 733.45),
-            ("234.56 + 78.9 × 1.1 =", 321.35),
-            ("567.89 - 45 × 2.3 =", 464.39),
-            ("123.45 + 456 × 0.89 =", 529.29),
-            ("78.9 × 4.5 - 67.89 =", 287.16),
-            ("345.67 - 78.91 + 123.45 =", 390.21),
-            ("567.8 × 0.6 + 45.67 =", 386.35),
-            ("23.4 × 9.61 - 44.134 =", 180.74)
-        ]
-        
-
-        question, correct_answer = random.choice(questions)
         content = BoxLayout(orientation='vertical', padding=10, spacing=10)
         
-        content.add_widget(Label(text=f"題目: {question}", font_name="NotoSerifCJKtc"))
+        question_label = Label(font_name="NotoSerifCJKtc")
+        content.add_widget(question_label)
     
-        answer_input = TextInput(hint_text="輸入答案", multiline=False, size_hint=(1, 1), font_name="NotoSerifCJKtc")
+        answer_input = TextInput(hint_text="輸入答案", multiline=False, size_hint=(1, 1), font_name=INPUT_FONT_NAME)
         content.add_widget(answer_input)
         error_message = Label(text="", color=(1, 0, 0, 1), font_name="NotoSerifCJKtc")
         content.add_widget(error_message)
@@ -554,7 +808,7 @@ class StudyHelperApp(App):
         def check_answer(instance):
             try:
                 user_answer = float(answer_input.text)
-                if user_answer == correct_answer:
+                if user_answer == state["answer"]:
                     close_button.opacity = 1  # 顯示關閉按鈕
                     retry_button.opacity = 0  # 隱藏重新輸入按鈕
                     error_message.text = "" 
@@ -569,7 +823,13 @@ class StudyHelperApp(App):
             error_message.text = ""  
             retry_button.opacity = 0  # 隱藏重新輸入按鈕
 
-        
+        def reset(question, correct_answer):
+            """換新題目並回到未作答的狀態"""
+            state["answer"] = correct_answer
+            question_label.text = f"題目: {question}"
+            reset_input(None)
+            close_button.opacity = 0
+
         popup = Popup(title="TIME UP!", content=content, size_hint=(0.7, 0.4), auto_dismiss=False )
 
 
@@ -577,10 +837,15 @@ class StudyHelperApp(App):
         answer_input.bind(on_text_validate=check_answer)
         
         retry_button.bind(on_press=reset_input)
-        popup.open()
+        return popup, reset
 
     def choose_color(self, instance):
         """打開顏色選擇器"""
+        self.popups.open("color")
+
+    def build_color_popup(self):
+        from kivy.uix.colorpicker import ColorPicker
+
         content = BoxLayout(orientation='vertical', spacing=10, padding=10)
         color_picker = ColorPicker(size_hint=(1, 1))
         content.add_widget(color_picker)
@@ -594,59 +859,92 @@ class StudyHelperApp(App):
         )
         content.add_widget(select_button)
 
-        self.color_popup = Popup(
+        popup = Popup(
             title="COLOR",
             content=content,
             size_hint=(0.9, 0.9),
             auto_dismiss=True
         )
-        self.color_popup.open()
+
+        def reset():
+            color_picker.color = self.text_color  # 從目前的顏色開始選
+
+        return popup, reset
 
     def apply_selected_color(self, color):
         self.text_color = color
         self.timer_label.color = color
         self.status_label.color = color
-        self.color_popup.dismiss()
+        self.popups.dismiss("color")
+
+    def sound_cache(self):
+        if self.sounds is None:
+            from audio import SoundCache
+            self.sounds = SoundCache()
+        return self.sounds
 
     def play_selected_music(self):
-        """播放選擇的音樂"""
+        """播放選擇的音樂（選擇時已在背景載入）"""
         if self.music_player:
             self.music_player.stop()
         
-        self.music_player = SoundLoader.load(self.selected_music)
+        self.music_player = self.sound_cache().get(self.selected_music)
         if self.music_player:
             self.music_player.play()
+            if self.alarm_deadline is not None:
+                Logger.info(f"Audio: alarm audible {(time.monotonic() - self.alarm_deadline) * 1000:.1f} ms after deadline")
+                self.alarm_deadline = None
 
     def select_music(self, path, selection):
-        """儲存選擇的音樂"""
+        """儲存選擇的音樂，並開始在背景載入"""
         if selection:
             self.selected_music = os.path.join(path, selection[0])
             print(f"選擇的音樂: {self.selected_music}")
-        self.music_popup.dismiss()
+            self.sound_cache().preload(self.selected_music)
+        self.popups.dismiss("music")
     
     def open_music_selector(self, instance):
-        """打開音樂選擇器"""
-        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        """打開音樂選擇器：先顯示索引中的音樂，再在背景掃描有變動的資料夾"""
+        self.popups.open("music")
 
-        file_chooser = FileChooserListView(filters=["*.mp3", "*.wav", "*.ogg"], size_hint=(1, 1))
-        content.add_widget(file_chooser)
-
-        select_button = Button(
-            text="確定選擇",
-            size_hint=(1, None),
-            height=40,
-            on_press=lambda x: self.select_music(file_chooser.path, file_chooser.selection),
-            font_name="NotoSerifCJKtc"
-        )
-        content.add_widget(select_button)
+    def build_music_popup(self):
+        from music_library import MusicLibrary
+        from widgets import make_recycle_list
 
-        self.music_popup = Popup(
+        self.music_library = MusicLibrary()
+        content = BoxLayout(orientation='vertical', spacing=10, padding=10)
+        self.music_list = make_recycle_list(row_height=60, size_hint=(1, 1))  # 只產生看得到的列
+        content.add_widget(self.music_list)
+        popup = Popup(
             title="choose music",
             content=content,
             size_hint=(0.9, 0.9),
             auto_dismiss=True
         )
-        self.music_popup.open()
+        return popup, self.reset_music_popup
+
+    def reset_music_popup(self):
+        # 掃描完成後回到主執行緒更新清單
+        self.music_library.scan_async(lambda changed: Clock.schedule_once(lambda dt: self.show_music_tracks()))
+        self.show_music_tracks()
+
+    def show_music_tracks(self):
+        tracks = self.music_library.tracks()
+        if not tracks:
+            self.music_list.data = [{"text": "搜尋音樂中…" if self.music_library.scanning else "找不到音樂"}]
+            return
+        self.music_list.data = [self.music_row(path, duration) for path, duration in tracks]
+
+    def music_row(self, path, duration):
+        name = os.path.basename(path)
+        if duration is not None:
+            minutes, seconds = divmod(int(duration), 60)
+            name = f"{name} ({minutes:02}:{seconds:02})"
+        return {
+            "text": name,
+            "button_text": "選擇",
+            "on_press": lambda row: self.select_music(os.path.dirname(path), [os.path.basename(path)])
+        }
 
        
 if __name__ == '__main__':
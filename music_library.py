@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import threading
+import wave
+
+from persistence import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+MUSIC_EXTENSIONS = (".mp3", ".wav", ".ogg")
+INDEX_VERSION = 1
+
+
+def music_folders():
+    """要掃描的資料夾：STUDY_MUSIC_DIRS（以 os.pathsep 分隔），預設為 ~/Music 與目前目錄"""
+    configured = os.environ.get("STUDY_MUSIC_DIRS")
+    if configured:
+        folders = configured.split(os.pathsep)
+    else:
+        folders = [os.path.expanduser("~/Music"), os.getcwd()]
+    return [os.path.abspath(folder) for folder in folders if os.path.isdir(folder)]
+
+
+def _duration(path):
+    """音樂長度（秒）；wav 用標準函式庫，其他格式需要 mutagen，無法取得時為 None"""
+    try:
+        if path.lower().endswith(".wav"):
+            with wave.open(path, "rb") as file:
+                return file.getnframes() / float(file.getframerate())
+        import mutagen
+        info = mutagen.File(path)
+        return info.info.length if info is not None else None
+    except Exception:
+        return None
+
+
+class MusicLibrary:
+    """音樂資料夾的索引，保存在 music_index.json
+
+    每個資料夾記錄自己的 mtime 與其中音樂的 (大小, mtime, 長度)。
+    重新掃描時資料夾的 mtime 沒變就沿用記錄，只列出有變動的資料夾；
+    檔案的大小與 mtime 都沒變也不重新讀取長度。
+    （直接覆寫檔案內容不會改變資料夾的 mtime，這種修改要等資料夾有增刪才會更新。）
+    """
+
+    def __init__(self, folders=None, cache_file="music_index.json"):
+        self.folders = music_folders() if folders is None else folders
+        self.cache_file = cache_file
+        self._dirs = self._read()  # 資料夾 -> {"mtime_ns", "dirs", "files"}
+        self._lock = threading.Lock()
+        self._scanning = False
+        self.scanned_dirs = 0  # 上次掃描實際列出的資料夾數
+
+    def _read(self):
+        if not os.path.exists(self.cache_file):
+            return {}
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as file:
+                data = json.load(file)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            return {}  # 損壞的索引（例如舊版以系統語系寫入）視為沒有索引，重新掃描後覆寫
+        if not isinstance(data, dict) or data.get("version") != INDEX_VERSION:
+            return {}
+        return data.get("dirs", {})
+
+    @property
+    def scanning(self):
+        return self._scanning
+
+    def tracks(self):
+        """已索引的音樂，依檔名排序，每首為 (路徑, 長度)"""
+        with self._lock:
+            dirs = dict(self._dirs)
+        found = []
+        for folder in self.folders:
+            found.extend(self._walk_cached(dirs, folder))
+        found.sort(key=lambda track: os.path.basename(track[0]).lower())
+        return found
+
+    def _walk_cached(self, dirs, folder):
+        stack = [folder]
+        while stack:
+            entry = dirs.get(stack.pop())
+            if entry is None:
+                continue
+            for name, info in entry["files"].items():
+                yield os.path.join(entry["path"], name), info["duration"]
+            stack.extend(os.path.join(entry["path"], sub) for sub in entry["dirs"])
+
+    def scan(self):
+        """掃描所有資料夾並寫入索引，回傳是否有變動"""
+        with self._lock:
+            old = dict(self._dirs)
+        new = {}
+        self.scanned_dirs = 0
+        for folder in self.folders:
+            stack = [folder]
+            while stack:
+                path = stack.pop()
+                if path in new:
+                    continue
+                entry = self._scan_dir(path, old.get(path))
+                if entry is None:
+                    continue
+                new[path] = entry
+                stack.extend(os.path.join(path, sub) for sub in entry["dirs"])
+        changed = new != old
+        with self._lock:
+            self._dirs = new
+        if changed:
+            write_json_atomic(self.cache_file, {"version": INDEX_VERSION, "dirs": new}, ensure_ascii=False)
+        return changed
+
+    def _scan_dir(self, path, cached):
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+        if cached is not None and cached["mtime_ns"] == mtime_ns:
+            return cached  # 資料夾內容沒有增刪，不必列出
+        self.scanned_dirs += 1
+        old_files = cached["files"] if cached is not None else {}
+        dirs, files = [], {}
+        try:
+            entries = list(os.scandir(path))
+        except OSError:
+            logger.warning("無法讀取資料夾: %s", path)
+            return None
+        for item in entries:
+            try:
+                if item.is_dir(follow_symlinks=False):
+                    if not item.name.startswith("."):
+                        dirs.append(item.name)
+                elif item.name.lower().endswith(MUSIC_EXTENSIONS):
+                    st = item.stat()
+                    info = old_files.get(item.name)
+                    if info is None or info["size"] != st.st_size or info["mtime_ns"] != st.st_mtime_ns:
+                        info = {"size": st.st_size, "mtime_ns": st.st_mtime_ns,
+                                "duration": _duration(item.path)}
+                    files[item.name] = info
+            except OSError:
+                continue
+        return {"path": path, "mtime_ns": mtime_ns, "dirs": sorted(dirs), "files": files}
+
+    def scan_async(self, on_done):
+        """在背景執行緒掃描，完成後在該執行緒呼叫 on_done(changed)；掃描中不重複啟動"""
+        with self._lock:
+            if self._scanning:
+                return False
+            self._scanning = True
+
+        def run():
+            changed = False
+            try:
+                changed = self.scan()
+            except Exception:
+                logger.exception("掃描音樂資料夾失敗")
+            finally:
+                with self._lock:
+                    self._scanning = False
+            on_done(changed)
+
+        threading.Thread(target=run, name="MusicLibrary", daemon=True).start()
+        return True
@@ -0,0 +1,144 @@
+import json
+import logging
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+
+def write_json_atomic(path, data, **kwargs):
+    """先寫入暫存檔再改名，寫到一半中斷也不會留下壞掉的檔案
+
+    一律以 UTF-8 寫入：ensure_ascii=False 時不受系統語系（例如 Windows 的 cp950）影響。
+    """
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(data, file, **kwargs)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+
+
+class FileLock:
+    """跨行程的互斥鎖（fcntl.flock / msvcrt.locking），行程結束時由系統自動釋放"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    @property
+    def locked(self):
+        return self._file is not None
+
+    def _try_lock(self, file):
+        if fcntl is not None:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+
+    def acquire(self, timeout=0.0, interval=0.05):
+        """取得鎖，timeout 秒內取不到時回傳 False"""
+        if self._file is not None:
+            return True
+        file = open(self.path, "a+")
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self._try_lock(file)
+            except OSError:
+                if time.monotonic() >= deadline:
+                    file.close()
+                    return False
+                time.sleep(interval)
+            else:
+                self._file = file
+                return True
+
+    def release(self):
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        self._file.close()
+        self._file = None
+
+
+class BackgroundWriter:
+    """在背景執行緒合併並執行寫檔工作
+
+    同一個 key 在合併時間窗內只保留最後一次排入的工作，
+    所以連續修改多次只會寫一次檔案。
+    """
+
+    def __init__(self, delay=0.5):
+        self.delay = delay
+        self.writes = 0  # 實際執行過的寫檔工作數
+        self._jobs = {}
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()  # 保證工作依排入順序執行
+        self._thread = None
+        self._closed = False
+
+    def schedule(self, key, job):
+        """標記資料為 dirty，排入寫檔工作（不會阻塞呼叫端）"""
+        with self._cond:
+            self._jobs[key] = job
+            if self._thread is None and not self._closed:
+                self._thread = threading.Thread(target=self._run, name="BackgroundWriter", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    @property
+    def dirty(self):
+        return bool(self._jobs)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._jobs and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._jobs:
+                    return
+                # 等待合併時間窗，期間排入的工作一起寫
+                deadline = time.monotonic() + self.delay
+                while not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            self._drain()
+
+    def _drain(self):
+        with self._io_lock:
+            with self._cond:
+                jobs, self._jobs = self._jobs, {}
+            for key, job in jobs.items():
+                try:
+                    job()
+                    self.writes += 1
+                except Exception:
+                    logger.exception("背景寫入失敗: %s", key)
+
+    def flush(self):
+        """同步寫入所有待寫資料（on_stop / on_pause / 測試使用）"""
+        self._drain()
+
+    def close(self):
+        self.flush()
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,252 @@
+import enum
+import heapq
+import itertools
+from datetime import date
+
+
+class Frequency(enum.IntFlag):
+    DAILY = 1
+    WEEKLY = 2
+
+
+PENDING = 0
+COMPLETED = 1
+STATUS_NAMES = ("Pending", "Completed")
+
+
+def to_ordinal(date_text):
+    """YYYY-MM-DD 轉為日期序數"""
+    return date.fromisoformat(date_text).toordinal()
+
+
+def from_ordinal(ordinal):
+    """日期序數轉為 YYYY-MM-DD"""
+    return date.fromordinal(ordinal).isoformat()
+
+
+class Plan:
+    """學習計劃
+
+    日期存為整數序數、週期為 Frequency、狀態為 PENDING/COMPLETED，
+    只在讀寫檔案時與原本的字典格式互轉。
+    """
+
+    __slots__ = ("id", "name", "due", "frequency", "created", "status")
+
+    def __init__(self, name, due, frequency, created, status=PENDING, plan_id=None):
+        self.id = plan_id  # 由儲存後端在新增時分配
+        self.name = name
+        self.due = due  # 截止日序數
+        self.frequency = frequency
+        self.created = created  # 建立日序數
+        self.status = status
+
+    @property
+    def daily(self):
+        return bool(self.frequency & Frequency.DAILY)
+
+    @property
+    def weekly(self):
+        return bool(self.frequency & Frequency.WEEKLY)
+
+    @property
+    def completed(self):
+        return self.status == COMPLETED
+
+    @property
+    def due_date(self):
+        return from_ordinal(self.due)
+
+    @property
+    def create_date(self):
+        return from_ordinal(self.created)
+
+    @property
+    def status_name(self):
+        return STATUS_NAMES[self.status]
+
+    @classmethod
+    def from_dict(cls, data):
+        frequency = Frequency(0)
+        if data.get("daily", False):
+            frequency |= Frequency.DAILY
+        if data.get("weekly", False):
+            frequency |= Frequency.WEEKLY
+        return cls(
+            data["name"],
+            to_ordinal(data["due_date"]),
+            frequency,
+            to_ordinal(data["create_date"]),
+            COMPLETED if data.get("status") == "Completed" else PENDING,
+            data.get("id")
+        )
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "due_date": self.due_date,
+            "daily": self.daily,
+            "weekly": self.weekly,
+            "create_date": self.create_date,
+            "status": self.status_name
+        }
+
+    def __repr__(self):
+        return f"Plan({self.to_dict()!r})"
+
+
+class PlanModel:
+    """可觀察的計劃清單
+
+    所有新增、刪除、修改都經過這裡，完成後通知監聽者
+    on_insert(plan) / on_remove(plan) / on_update(plan)，
+    讓畫面只套用變動的部分。plans 是 {id: plan}，查詢與刪除都是 O(1)。
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.plans = store.load_plans()
+        self.schedule = PlanSchedule(self.plans.values())
+        self._listeners = [self.schedule]
+
+    def bind(self, listener):
+        """listener 需提供 on_insert / on_remove / on_update，可另提供 on_insert_many / on_expire"""
+        self._listeners.append(listener)
+
+    def _emit(self, event, plan):
+        for listener in self._listeners:
+            getattr(listener, event)(plan)
+
+    def _emit_insert_many(self, plans):
+        """監聽者有 on_insert_many 時一次通知，否則逐一 on_insert"""
+        for listener in self._listeners:
+            insert_many = getattr(listener, "on_insert_many", None)
+            if insert_many is not None:
+                insert_many(plans)
+            else:
+                for plan in plans:
+                    listener.on_insert(plan)
+
+    def get(self, plan_id):
+        return self.plans.get(plan_id)
+
+    def add(self, plan):
+        self.store.add_plan(plan)
+        self._emit("on_insert", plan)
+
+    def remove(self, plan):
+        self.store.delete_plan(plan)
+        self._emit("on_remove", plan)
+
+    def import_plans(self, batches):
+        """大量新增（見 study_io）：儲存只提交一次，最後一次通知監聽者
+
+        已完成的計劃直接封存、不通知，回傳加入進行中清單的計劃。
+        """
+        plans = self.store.import_plans(batches)
+        if plans:
+            self._emit_insert_many(plans)
+        return plans
+
+    def expire_overdue(self, today):
+        """截止日早於 today (date) 的計劃改為 Completed 並移到封存
+
+        逐一通知 on_expire（沒有時為 on_remove），清單可依目前的條件決定是否保留。
+        """
+        expired = self.schedule.pop_expired(today)
+        if not expired:
+            return expired
+        for plan in expired:
+            plan.status = COMPLETED
+        self.store.archive_plans(expired)
+        for listener in self._listeners:
+            expire = getattr(listener, "on_expire", None) or listener.on_remove
+            for plan in expired:
+                expire(plan)
+        return expired
+
+    def history(self, plan):
+        """計劃的簽到記錄 (history.CheckinBits)"""
+        return self.store.history(plan)
+
+    def histories(self):
+        """所有進行中計劃的簽到記錄 {plan.id: CheckinBits}，一次讀入"""
+        return self.store.histories()
+
+    def archived_count(self):
+        return self.store.archived_count()
+
+    def archived(self, offset=0, limit=50):
+        """分頁讀取已封存的計劃（開啟歷史計劃時才讀取）"""
+        return self.store.load_archive(offset, limit)
+
+
+class PlanSchedule:
+    """到期索引：每日計劃一組、每周計劃依建立日的星期餘數分成 7 組，
+    另以 min-heap 依截止日排序，換日時只需彈出已過期的計劃。
+
+    作為 PlanModel 的監聽者隨新增/刪除/修改同步更新。
+    """
+
+    def __init__(self, plans=()):
+        self.daily = {}  # plan.id -> plan，保持加入順序
+        self.weekly = [{} for _ in range(7)]  # 建立日序數 % 7 -> {plan.id: plan}
+        self._buckets = {}  # plan.id -> 所在的組，只包含進行中的計劃
+        self._heap = []  # (截止日序數, 序號, plan)
+        self._seq = itertools.count()
+        for plan in plans:
+            self._add(plan)
+
+    def _add(self, plan):
+        if plan.completed:
+            return
+        if plan.daily:
+            bucket = self.daily
+        elif plan.weekly:
+            bucket = self.weekly[plan.created % 7]
+        else:
+            bucket = {}
+        bucket[plan.id] = plan
+        self._buckets[plan.id] = bucket
+        heapq.heappush(self._heap, (plan.due, next(self._seq), plan))
+
+    def _discard(self, plan):
+        # heap 中的項目延後到彈出時才略過
+        bucket = self._buckets.pop(plan.id, None)
+        if bucket is not None:
+            del bucket[plan.id]
+
+    def is_due(self, plan, day):
+        """計劃在 day (date) 是否需要完成"""
+        key = plan.id
+        return key in self.daily or key in self.weekly[day.toordinal() % 7]
+
+    def due_on(self, day):
+        """day (date) 需要完成的計劃，成本只與當天到期的數量有關"""
+        return list(self.daily.values()) + list(self.weekly[day.toordinal() % 7].values())
+
+    def pop_expired(self, day):
+        """彈出截止日早於 day (date) 且仍在進行中的計劃"""
+        limit = day.toordinal()
+        expired = []
+        while self._heap and self._heap[0][0] < limit:
+            _, _, plan = heapq.heappop(self._heap)
+            if plan.id in self._buckets:
+                self._discard(plan)
+                expired.append(plan)
+        return expired
+
+    def on_insert(self, plan):
+        self._add(plan)
+
+    def on_insert_many(self, plans):
+        for plan in plans:
+            self._add(plan)
+
+    def on_remove(self, plan):
+        self._discard(plan)
+
+    def on_update(self, plan):
+        if plan.completed:
+            self._discard(plan)
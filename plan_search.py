@@ -0,0 +1,147 @@
+import bisect
+import unicodedata
+
+from plan_model import COMPLETED
+
+GRAM_SIZE = 2  # 中文名稱沒有分詞，以單字與相鄰兩字建立索引
+
+_EMPTY = frozenset()
+
+
+def normalize(text):
+    """搜尋用的文字：全形轉半形、忽略大小寫與空白"""
+    return "".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+
+def grams(text):
+    """text 中所有的單字與相鄰兩字（已 normalize）"""
+    result = set(text)
+    result.update(text[index:index + GRAM_SIZE] for index in range(len(text) - GRAM_SIZE + 1))
+    return result
+
+
+class PlanFilter:
+    """計劃清單的搜尋條件；None 表示不限"""
+
+    __slots__ = ("text", "status", "frequency", "due_from", "due_to", "sort_by_due")
+
+    def __init__(self, text="", status=None, frequency=None, due_from=None, due_to=None, sort_by_due=False):
+        self.text = normalize(text)
+        self.status = status  # PENDING / COMPLETED
+        self.frequency = frequency  # Frequency.DAILY / Frequency.WEEKLY
+        self.due_from = due_from  # 截止日序數（含）
+        self.due_to = due_to
+        self.sort_by_due = sort_by_due  # False 時依加入順序
+
+    def matches(self, plan):
+        """plan 是否符合條件（單一計劃，例如新增時判斷是否顯示）"""
+        return self.matches_fields(plan) and (not self.text or self.text in normalize(plan.name))
+
+    def matches_fields(self, plan):
+        """名稱以外的條件"""
+        return (
+            (self.status is None or plan.status == self.status)
+            and (self.frequency is None or bool(plan.frequency & self.frequency))
+            and (self.due_from is None or plan.due >= self.due_from)
+            and (self.due_to is None or plan.due <= self.due_to)
+        )
+
+    def sort_key(self, plan):
+        return (plan.due, plan.id) if self.sort_by_due else plan.id
+
+
+class PlanIndex:
+    """計劃名稱的 n-gram 索引與截止日排序，作為 PlanModel 的監聽者隨新增/刪除更新
+
+    查詢時取關鍵字各 gram 的清單求交集（由最短的開始），
+    成本與符合的計劃數有關，不需要掃描全部計劃。
+    沒有關鍵字時以依截止日排序的清單二分搜尋截止日範圍。
+    已封存的計劃在 load_archive() 後才加入（第一次搜尋已完成的計劃時）。
+    """
+
+    def __init__(self, plans=()):
+        self.plans = {}  # plan.id -> plan
+        self._names = {}  # plan.id -> normalize 後的名稱
+        self._postings = {}  # gram -> {plan.id}
+        self._by_due = []  # (截止日序數, plan.id)，已排序
+        self.archive_loaded = False
+        self.on_insert_many(plans)
+
+    def _add(self, plan):
+        name = normalize(plan.name)
+        self.plans[plan.id] = plan
+        self._names[plan.id] = name
+        for gram in grams(name):
+            self._postings.setdefault(gram, set()).add(plan.id)
+
+    def _discard(self, plan):
+        name = self._names.pop(plan.id, None)
+        if name is None:
+            return
+        plan = self.plans.pop(plan.id)
+        for gram in grams(name):
+            ids = self._postings[gram]
+            ids.discard(plan.id)
+            if not ids:
+                del self._postings[gram]
+        index = bisect.bisect_left(self._by_due, (plan.due, plan.id))
+        del self._by_due[index]
+
+    def on_insert(self, plan):
+        self._add(plan)
+        bisect.insort(self._by_due, (plan.due, plan.id))
+
+    def on_insert_many(self, plans):
+        plans = [plan for plan in plans if plan.id not in self.plans]
+        for plan in plans:
+            self._add(plan)
+        self._by_due.extend((plan.due, plan.id) for plan in plans)
+        self._by_due.sort()
+
+    def on_remove(self, plan):
+        if plan.status == COMPLETED and self.archive_loaded:
+            return  # 過期移到封存，仍可搜尋
+        self._discard(plan)
+
+    def on_update(self, plan):
+        self._discard(plan)
+        self.on_insert(plan)
+
+    def load_archive(self, plans):
+        """加入已封存的計劃"""
+        self.on_insert_many(plans)
+        self.archive_loaded = True
+
+    def search(self, text):
+        """名稱包含 text 的計劃 id；text 為空時回傳 None（不限）"""
+        query = normalize(text)
+        if not query:
+            return None
+        if len(query) < GRAM_SIZE:
+            keys = {query}
+        else:
+            keys = {query[index:index + GRAM_SIZE] for index in range(len(query) - GRAM_SIZE + 1)}
+        postings = sorted((self._postings.get(key, _EMPTY) for key in keys), key=len)
+        found = set(postings[0])
+        for ids in postings[1:]:
+            if not found:
+                break
+            found &= ids
+        if len(query) > GRAM_SIZE:  # 相鄰兩字都符合不代表整段連續出現
+            found = {plan_id for plan_id in found if query in self._names[plan_id]}
+        return found
+
+    def query(self, plan_filter):
+        """符合 plan_filter 的計劃，依條件排序"""
+        found = self.search(plan_filter.text)
+        if found is None:
+            # 沒有關鍵字：由截止日清單取出範圍內的計劃
+            low = 0 if plan_filter.due_from is None else bisect.bisect_left(self._by_due, (plan_filter.due_from,))
+            high = len(self._by_due) if plan_filter.due_to is None \
+                else bisect.bisect_left(self._by_due, (plan_filter.due_to + 1,))
+            plans = [self.plans[plan_id] for _, plan_id in self._by_due[low:high]]
+            if not plan_filter.sort_by_due:
+                plans.sort(key=plan_filter.sort_key)
+        else:
+            plans = sorted((self.plans[plan_id] for plan_id in found), key=plan_filter.sort_key)
+        return [plan for plan in plans if plan_filter.matches_fields(plan)]
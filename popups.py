@@ -0,0 +1,41 @@
+from collections import Counter
+
+
+class PopupManager:
+    """每種對話框只建立一次，之後重設內容再重複使用
+
+    register(kind, build) 的 build() 回傳 (popup, reset)，
+    open(kind, *args) 第一次開啟時才呼叫 build，每次開啟前呼叫 reset(*args)。
+    """
+
+    def __init__(self):
+        self._builders = {}
+        self._dialogs = {}  # kind -> (popup, reset)
+        self.constructed = Counter()
+        self.reused = Counter()
+
+    def register(self, kind, build):
+        self._builders[kind] = build
+
+    def get(self, kind):
+        dialog = self._dialogs.get(kind)
+        if dialog is None:
+            dialog = self._dialogs[kind] = self._builders[kind]()
+            self.constructed[kind] += 1
+        else:
+            self.reused[kind] += 1
+        return dialog
+
+    def open(self, kind, *args):
+        popup, reset = self.get(kind)
+        reset(*args)
+        popup.open()
+        return popup
+
+    def dismiss(self, kind):
+        dialog = self._dialogs.get(kind)
+        if dialog is not None:
+            dialog[0].dismiss()
+
+    def stats(self):
+        return {kind: (self.constructed[kind], self.reused[kind]) for kind in self._builders}
@@ -0,0 +1,126 @@
+import collections
+import functools
+import json
+import os
+import threading
+import time
+
+FRAME_BUDGET = 1 / 60  # 60 Hz 一格 16.7 ms
+# 與上一格的間隔超過 1.5 格才算掉幀；垂直同步下正常的畫格也常略超過 16.7 ms
+SLOW_FRAME = FRAME_BUDGET * 1.5
+MAX_EVENTS = 200_000  # trace 最多保留的事件數，超過時丟棄最舊的
+
+
+def profiling_enabled():
+    return os.environ.get("STUDY_PROFILE") == "1"
+
+
+class _Stat:
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, duration):
+        self.count += 1
+        self.total += duration
+        if duration > self.max:
+            self.max = duration
+
+
+class Profiler:
+    """低負擔的計時：包裝函式記錄每次呼叫的耗時（奈秒）
+
+    統計分成累計與最近一個區間（由 take_window() 取出並歸零），
+    每次呼叫另存一筆 Chrome trace 事件，dump() 寫成 chrome://tracing / Perfetto 可讀的 JSON。
+    未開啟時不包裝任何函式，沒有額外負擔。
+    """
+
+    def __init__(self, enabled=None):
+        self.enabled = profiling_enabled() if enabled is None else enabled
+        self.totals = collections.defaultdict(_Stat)
+        self._window = collections.defaultdict(_Stat)
+        self._events = collections.deque(maxlen=MAX_EVENTS)
+        self._origin = time.perf_counter_ns()
+        self.frames = 0
+        self.slow_frames = 0
+        self._window_frames = [0, 0]  # 區間內的 (畫格數, 掉幀數)
+
+    def wrap(self, name, func, category="app"):
+        """回傳包裝後的函式；未開啟時原樣回傳"""
+        if not self.enabled:
+            return func
+        clock = time.perf_counter_ns
+        events = self._events
+        totals = self.totals
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            started = clock()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                duration = clock() - started
+                totals[name].add(duration)
+                self._window[name].add(duration)  # take_window() 會換成新的字典
+                events.append((name, category, started, duration, threading.get_ident()))
+
+        return timed
+
+    def instrument(self, obj, names, category="app", prefix=None):
+        """把 obj 上的方法換成計時版本（只影響這個實例）"""
+        if not self.enabled:
+            return
+        prefix = prefix or type(obj).__name__
+        for name in names:
+            method = getattr(obj, name, None)
+            if callable(method):
+                setattr(obj, name, self.wrap(f"{prefix}.{name}", method, category))
+
+    def instrument_class(self, cls, names, category="app"):
+        """把類別的方法換成計時版本（影響所有實例，例如 Label.texture_update）"""
+        if not self.enabled:
+            return
+        for name in names:
+            method = cls.__dict__.get(name)
+            if method is not None:
+                setattr(cls, name, self.wrap(f"{cls.__name__}.{name}", method, category))
+
+    def record_frame(self, dt):
+        """每個畫格呼叫一次，dt 為與上一格的間隔秒數"""
+        self.frames += 1
+        self._window_frames[0] += 1
+        if dt > SLOW_FRAME:
+            self.slow_frames += 1
+            self._window_frames[1] += 1
+            now = time.perf_counter_ns()
+            self._events.append(("slow frame", "frame", now - int(dt * 1e9), int(dt * 1e9), threading.get_ident()))
+
+    def take_window(self):
+        """取出最近一個區間的統計並歸零：(畫格數, 掉幀數, {名稱: _Stat})"""
+        frames, slow = self._window_frames
+        stats, self._window = self._window, collections.defaultdict(_Stat)
+        self._window_frames = [0, 0]
+        return frames, slow, stats
+
+    def summary(self, limit=10):
+        """累計耗時最多的 limit 項：[(名稱, 次數, 總毫秒, 最大毫秒)]"""
+        ranked = sorted(self.totals.items(), key=lambda item: item[1].total, reverse=True)[:limit]
+        return [(name, stat.count, stat.total / 1e6, stat.max / 1e6) for name, stat in ranked]
+
+    def dump(self, path):
+        """寫出 Chrome trace 格式 (traceEvents，單位為微秒)"""
+        pid = os.getpid()
+        trace = [
+            {"name": name, "cat": category, "ph": "X", "pid": pid, "tid": tid,
+             "ts": (started - self._origin) / 1000, "dur": duration / 1000}
+            for name, category, started, duration, tid in list(self._events)
+        ]
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": trace, "displayTimeUnit": "ms"}, file, ensure_ascii=False)
+        return len(trace)
+
+
+PROFILER = Profiler()
@@ -0,0 +1,182 @@
+from datetime import date
+
+from history import CheckinBits
+
+HEATMAP_WEEKS = 26  # 熱圖顯示的週數
+
+
+def _flags(value, length, step=1):
+    """整數的前 length 個位元每隔 step 取一個，回傳 "0"/"1" 字串（第 0 位在最前）
+
+    以字串處理在 C 中完成，不需要逐位元的 Python 迴圈。
+    """
+    if length <= 0:
+        return ""
+    return format(value, "b").zfill(length)[::-1][::step]
+
+
+def _runs(flags):
+    """回傳 (最後一段連續 1 的長度, 最長一段連續 1 的長度)"""
+    return len(flags) - len(flags.rstrip("1")), max(map(len, flags.split("0")))
+
+
+def _column_counts(values, length):
+    """每個位元位置在 values 中為 1 的個數
+
+    以位元切片的計數器累加（planes[i] 是計數的第 i 位），每個值只需要幾次整數運算。
+    """
+    planes = []
+    for carry in values:
+        index = 0
+        while carry:
+            if index == len(planes):
+                planes.append(0)
+            planes[index], carry = planes[index] ^ carry, planes[index] & carry
+            index += 1
+    return [sum(((plane >> day) & 1) << index for index, plane in enumerate(planes)) for day in range(length)]
+
+
+class PlanStats:
+    """一個計劃的連續完成紀錄；以「應完成的日子」計算，每周計劃一週算一次"""
+
+    __slots__ = ("step", "streak", "longest", "last_done")
+
+    def __init__(self, step, streak=0, longest=0, last_done=None):
+        self.step = step  # 相鄰兩次應完成日的間隔天數
+        self.streak = streak  # 到 last_done 為止的連續次數
+        self.longest = longest
+        self.last_done = last_done
+
+    def current(self, today):
+        """目前的連續次數；錯過今天之前的應完成日就歸零"""
+        if self.last_done is None or self.last_done < today - self.step:
+            return 0
+        return self.streak
+
+    def record(self, day):
+        if self.last_done is not None and day <= self.last_done:
+            return
+        if self.last_done is not None and day - self.last_done == self.step:
+            self.streak += 1
+        else:
+            self.streak = 1
+        self.last_done = day
+        self.longest = max(self.longest, self.streak)
+
+
+class StatsModel:
+    """學習統計：每個計劃與全部計劃的連續天數、近 7 天完成率、熱圖
+
+    第一次開啟統計頁時一次讀入所有簽到記錄 (model.histories) 後以整數位元運算算出，
+    之後 record() 只更新當天的數字，不重新掃描整段歷史。
+    作為 PlanModel 的監聽者，新增/移除計劃時同步更新。
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self.built_on = None  # 建立統計時的日期序數；None 表示尚未建立
+        self.plans = {}  # plan.id -> PlanStats
+        self.any_day = None  # 有任何簽到的日子 (CheckinBits)
+        self.longest_any = 0
+        self.first = 0  # 熱圖第一天的序數
+        self.counts = None  # 熱圖每天完成的計劃數
+
+    @staticmethod
+    def _step(plan):
+        return 1 if plan.daily else 7
+
+    def build(self, today):
+        """由簽到記錄計算所有統計（today 為日期序數）"""
+        start = today - HEATMAP_WEEKS * 7 + 1
+        self.first = start - (start - 1) % 7  # 對齊到星期一（序數 1 是星期一），熱圖每一列是同一個星期幾
+        days = today - self.first + 1
+        self.plans = {}
+        windows = []
+        union = 0
+        origin = min((plan.created for plan in self.model.plans.values()), default=today)
+        histories = self.model.histories()  # 一次讀入，不必每個計劃查詢一次
+        for plan in self.model.plans.values():
+            bits = histories[plan.id]
+            self.plans[plan.id] = self._plan_stats(plan, bits, today)
+            windows.append(bits.window(self.first, today)[0])
+            union |= bits.window(origin, today)[0]
+        self.counts = _column_counts(windows, days)
+        self.any_day = CheckinBits(origin, union.to_bytes((union.bit_length() + 7) // 8, "little"))
+        self.longest_any = self.any_day.longest_streak()
+        self.built_on = today
+
+    def _plan_stats(self, plan, bits, today):
+        step = self._step(plan)
+        occurrences = _flags(*bits.window(plan.created, today), step)  # 每個應完成日是否完成
+        last_index = occurrences.rfind("1")
+        if last_index < 0:
+            return PlanStats(step)
+        # 連續次數算到最後一次完成為止，是否已中斷由 PlanStats.current 判斷
+        streak, longest = _runs(occurrences[:last_index + 1])
+        return PlanStats(step, streak, longest, plan.created + last_index * step)
+
+    def ensure(self, today):
+        """統計尚未建立或已換日時才重新計算"""
+        if self.built_on != today:
+            self.build(today)
+
+    def invalidate(self):
+        """簽到記錄被大量修改（例如匯入）後呼叫，下次 ensure 時重新計算"""
+        self.built_on = None
+
+    def record(self, plan, day):
+        """簽到後呼叫（day 為日期序數），只更新受影響的數字"""
+        if self.built_on is None:
+            return
+        if day > self.built_on:
+            self.build(day)  # 換日後第一次簽到：記錄已包含這次簽到
+            return
+        stats = self.plans.get(plan.id)
+        if stats is not None:
+            stats.record(day)
+        if day >= self.first:
+            self.counts[day - self.first] += 1
+        if self.any_day.add(day):
+            self.longest_any = max(self.longest_any, self.any_day.streak(day))
+
+    def plan_summary(self, plan, today):
+        stats = self.plans.get(plan.id) or PlanStats(self._step(plan))
+        bits = self.model.history(plan)
+        due = sum(1 for day in range(today - 6, today + 1)
+                  if day >= plan.created and (day - plan.created) % stats.step == 0)
+        done = bits.count(today - 6, today)
+        return {
+            "current": stats.current(today),
+            "longest": stats.longest,
+            "week_rate": done / due if due else 0.0
+        }
+
+    def overall_summary(self, today):
+        """全部計劃：連續有簽到的天數、最長紀錄、近 7 天完成率"""
+        schedule = self.model.schedule
+        # 與 plan_summary 相同：建立日之前的日子不算應完成
+        due = sum(1 for day in range(today - 6, today + 1)
+                  for plan in schedule.due_on(date.fromordinal(day)) if day >= plan.created)
+        done = sum(self.counts[-7:])
+        return {
+            "current": self.any_day.streak(today),
+            "longest": self.longest_any,
+            "week_rate": done / due if due else 0.0
+        }
+
+    def heatmap(self, plan=None):
+        """熱圖資料：由星期一 (first) 到今天每天的完成數；指定 plan 時為該計劃每天 0/1"""
+        if plan is None:
+            return list(self.counts)
+        bits = self.model.history(plan)
+        return [int(flag) for flag in _flags(*bits.window(self.first, self.built_on))]
+
+    def on_insert(self, plan):
+        if self.built_on is not None:
+            self.plans[plan.id] = PlanStats(self._step(plan))
+
+    def on_remove(self, plan):
+        self.plans.pop(plan.id, None)
+
+    def on_update(self, plan):
+        pass
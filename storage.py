@@ -0,0 +1,656 @@
+import itertools
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from history import CheckinBits
+from log_store import LogStore
+from plan_model import Plan, to_ordinal
+from persistence import BackgroundWriter, FileLock, write_json_atomic
+
+DATA_VERSION = 2  # 2: 計劃有固定 id，log 以 id 為 key
+LOCK_TIMEOUT = 2.0  # 等待另一個程式釋放 JSON 資料檔的秒數（命令列工具通常很快結束）
+
+
+class StoreBusyError(Exception):
+    """JSON 資料檔正由另一個程式（App 或命令列工具）使用"""
+
+
+def _read_json(data_file):
+    """讀取 study_data.json；格式錯誤時回傳 None"""
+    with open(data_file, "r", encoding="utf-8") as file:
+        try:
+            return json.load(file)
+        except json.JSONDecodeError:
+            return None
+
+
+def _read_archive(archive_file):
+    """讀取封存檔 (JSONL)，同一個 id 只保留最後一筆"""
+    plans = {}
+    if not os.path.exists(archive_file):
+        return plans
+    with open(archive_file, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                plan = Plan.from_dict(json.loads(line))
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                continue  # 寫到一半中斷的最後一行
+            plans[plan.id] = plan
+    return plans
+
+
+def _archive_order(plan):
+    """封存清單的排序：截止日較晚的在前"""
+    return (-plan.due, -plan.id)
+
+
+def _upgrade(data, log):
+    """讀入計劃，舊版資料會分配 id 並把 log 從名稱改以 id 為 key
+
+    同名的計劃原本共用進度，升級後各自保留一份。
+    只改寫記憶體中的 log，呼叫端寫入計劃檔後才寫入 log（LogStore.save）；
+    兩者之間中斷時計劃檔已是新版，但 log 仍有以名稱為 key 的記錄，下次啟動會再依名稱改寫。
+    回傳 ({id: plan}, next_id, log 是否有改寫)
+    """
+    plans = [Plan.from_dict(item) for item in data.get("plans", [])]
+    next_id = data.get("next_id", 1)
+    log.refresh()
+    if data.get("version", 1) < DATA_VERSION:
+        mapping = {}
+    else:
+        legacy = [key for key in log.keys() if not key.isdigit()]
+        if not legacy:
+            return {plan.id: plan for plan in plans}, next_id, False
+        mapping = {key: [key] for key in log.keys() if key.isdigit()}  # 已改以 id 為 key 的記錄保留
+    for plan in plans:
+        if plan.id is None:
+            plan.id = next_id
+            next_id += 1
+        mapping.setdefault(plan.name, []).append(str(plan.id))
+    log.rekey(mapping, save=False)
+    return {plan.id: plan for plan in plans}, next_id, True
+
+
+class JsonStore:
+    """以 study_data.json / log.json 保存資料（原本的格式）
+
+    study_data.json 只保存進行中的計劃，已完成的計劃附加到 study_archive.jsonl，
+    只在開啟歷史計劃時才讀取。
+    修改只會標記 dirty，由 BackgroundWriter 在背景合併後寫入。
+    整個檔案由記憶體中的內容覆寫，所以 load_plans 到 close 之間鎖定資料檔，
+    同時只能有一個程式開啟（另一個會得到 StoreBusyError）。
+    """
+
+    def __init__(self, data_file="study_data.json", log_file="log.json", writer=None,
+                 archive_file="study_archive.jsonl"):
+        self.data_file = data_file
+        self.archive_file = archive_file
+        self.writer = writer or BackgroundWriter()
+        self.log = LogStore(log_file, writer=self.writer)
+        self.plans = {}
+        self.next_id = 1
+        self._archive = None  # 封存的計劃，第一次查詢時才讀取
+        self._archive_pending = []  # 尚未附加到封存檔的計劃
+        self._archive_lock = threading.Lock()
+        self.lock = FileLock(data_file + ".lock")
+
+    def load_plans(self):
+        if not self.lock.acquire(LOCK_TIMEOUT):
+            raise StoreBusyError(f"{self.data_file} 正由另一個程式使用中，請先關閉 App"
+                                 "（或改用 SQLite，可與命令列工具同時使用）")
+        data = _read_json(self.data_file) if os.path.exists(self.data_file) else None
+        if data is None:
+            self.plans, self.next_id = {}, 1
+            self.save_plans()
+        else:
+            self.plans, self.next_id, upgraded = _upgrade(data, self.log)
+            completed = [plan for plan in self.plans.values() if plan.completed]
+            if completed:
+                # 舊資料中已完成的計劃移到封存檔
+                self.archive_plans(completed)
+            if upgraded or completed:
+                self.save_plans()
+                self.writer.flush()
+            if upgraded:
+                self.log.save()  # 計劃檔已是新版才寫入以 id 為 key 的 log
+        self.log.compact()  # 啟動時把上次的 journal 併入 log.json
+        for plan in self.plans.values():
+            self.log.set_origin(str(plan.id), plan.created)
+        return self.plans
+
+    def save_plans(self):
+        # 主執行緒只複製計劃的參照，to_dict 與序列化、寫檔都在背景執行緒
+        plans, next_id = tuple(self.plans.values()), self.next_id
+        self.writer.schedule(self.data_file, lambda: self._write_plans(plans, next_id))
+
+    def _write_plans(self, plans, next_id):
+        # 同一個工作中先附加封存檔，中途當機時計劃不會從兩邊都消失
+        self._write_archive()
+        data = {
+            "version": DATA_VERSION,
+            "next_id": next_id,
+            "plans": [plan.to_dict() for plan in plans]
+        }
+        write_json_atomic(self.data_file, data)
+
+    def add_plan(self, plan):
+        plan.id = self.next_id
+        self.next_id += 1
+        self.plans[plan.id] = plan
+        self.log.set_origin(str(plan.id), plan.created)
+        self.save_plans()
+
+    def import_plans(self, batches):
+        """大量新增：batches 逐批產生計劃，全部加入後只寫一次計劃檔與封存檔
+
+        先讀完所有批次才分配 id 並加入，讀取中途失敗時不改動任何狀態。
+        已完成的計劃直接放入封存，回傳加入進行中清單的計劃。
+        """
+        plans = [plan for batch in batches for plan in batch]
+        added = []
+        with self._archive_lock:
+            for plan in plans:
+                plan.id = self.next_id
+                self.next_id += 1
+                self.log.set_origin(str(plan.id), plan.created)
+                if plan.completed:
+                    self._archive_pending.append(plan.to_dict())
+                    if self._archive is not None:
+                        self._archive[plan.id] = plan
+                else:
+                    self.plans[plan.id] = plan
+                    added.append(plan)
+        self.save_plans()  # 寫入計劃檔前會先附加封存檔
+        self.writer.flush()
+        return added
+
+    def delete_plan(self, plan):
+        del self.plans[plan.id]
+        self.log.drop(str(plan.id))  # 刪除的計劃不保留簽到記錄
+        self.save_plans()
+
+    def archive_plans(self, plans):
+        """把已完成的計劃移出進行中的清單，附加到封存檔"""
+        with self._archive_lock:
+            for plan in plans:
+                del self.plans[plan.id]
+                self._archive_pending.append(plan.to_dict())
+                if self._archive is not None:
+                    self._archive[plan.id] = plan
+        self.save_plans()  # 寫入計劃檔前會先附加封存檔
+
+    def _write_archive(self):
+        with self._archive_lock:
+            if not self._archive_pending:
+                return
+            with open(self.archive_file, "a", encoding="utf-8") as file:
+                for data in self._archive_pending:
+                    file.write(json.dumps(data, ensure_ascii=False) + "\n")
+            self._archive_pending = []
+
+    def _archived(self):
+        if self._archive is None:
+            self._write_archive()
+            self._archive = _read_archive(self.archive_file)
+        return self._archive
+
+    def archived_count(self):
+        return len(self._archived())
+
+    def archived_ids(self):
+        return set(self._archived())
+
+    def load_archive(self, offset=0, limit=50):
+        """分頁讀取封存的計劃，截止日較晚的在前"""
+        plans = sorted(self._archived().values(), key=_archive_order)
+        return plans[offset:offset + limit]
+
+    def refresh_log(self, today=None):
+        self.log.refresh()
+
+    def has_log(self, plan_id, date):
+        return self.log.has(str(plan_id), date)
+
+    def add_log(self, plan_id, date):
+        return self.log.add(str(plan_id), date)
+
+    def history(self, plan):
+        """計劃的簽到記錄 (CheckinBits)"""
+        bits = self.log.history(str(plan.id))
+        return bits if bits is not None else CheckinBits(plan.created)
+
+    def histories(self):
+        """所有進行中計劃的簽到記錄 {plan.id: CheckinBits}"""
+        self.log.refresh()
+        return {plan.id: self.history(plan) for plan in self.plans.values()}
+
+    def import_logs(self, batches):
+        """大量新增簽到：batches 逐批產生 (plan_id, 日期)，回傳新增的筆數"""
+        added = 0
+        for batch in batches:
+            added += self.log.add_many((str(plan_id), day) for plan_id, day in batch)
+        if added:
+            self.log.compact()  # 大量記錄直接併入快照，journal 不會變得很長
+        return added
+
+    def iter_logs(self):
+        """逐筆列出 (plan_id, 日期)"""
+        self.log.refresh()
+        for key, day in self.log.entries():
+            yield int(key), day
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        self.writer.close()
+        self.log.compact()
+        self.lock.release()
+
+
+class SqliteStore:
+    """以 SQLite 保存資料，新增、刪除、簽到都是單筆操作
+
+    計劃的 id 就是 rowid，由 meta 資料表中的計數器分配，與同時開啟的命令列工具不會重複。
+    操作先排入佇列，由 BackgroundWriter 在背景以同一個交易批次寫入。
+    已完成的計劃移到 plans_archive 資料表，啟動時只讀取進行中的計劃。
+    簽到記錄除了 log 的每一列，另在 history 資料表保存每個計劃的 CheckinBits 位元組，
+    與 log 在同一個交易中更新，統計時一次查詢就能讀入全部計劃的記錄。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS plans (
+            name TEXT NOT NULL,
+            due_date TEXT NOT NULL,
+            daily INTEGER NOT NULL,
+            weekly INTEGER NOT NULL,
+            create_date TEXT NOT NULL,
+            weekday INTEGER NOT NULL,
+            status TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS plans_status_due ON plans (status, due_date);
+        CREATE INDEX IF NOT EXISTS plans_weekday ON plans (weekday);
+        CREATE TABLE IF NOT EXISTS plans_archive (
+            name TEXT NOT NULL,
+            due_date TEXT NOT NULL,
+            daily INTEGER NOT NULL,
+            weekly INTEGER NOT NULL,
+            create_date TEXT NOT NULL,
+            weekday INTEGER NOT NULL,
+            status TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS plans_archive_due ON plans_archive (due_date);
+        CREATE TABLE IF NOT EXISTS log (
+            plan_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            PRIMARY KEY (plan_id, date)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS log_date ON log (date);
+        CREATE TABLE IF NOT EXISTS history (
+            plan_id INTEGER PRIMARY KEY,
+            start INTEGER NOT NULL,
+            bits BLOB NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+    """
+
+    # 舊版 log 以計劃名稱 (plan_key) 為 key，改為以 id 為 key
+    REKEY_LOG = """
+        CREATE TABLE log_by_id (
+            plan_id INTEGER NOT NULL,
+            date TEXT NOT NULL,
+            PRIMARY KEY (plan_id, date)
+        ) WITHOUT ROWID;
+        INSERT OR IGNORE INTO log_by_id (plan_id, date)
+            SELECT plans.rowid, log.date FROM log JOIN plans ON plans.name = log.plan_key;
+        DROP TABLE log;
+        ALTER TABLE log_by_id RENAME TO log;
+        CREATE INDEX IF NOT EXISTS log_date ON log (date);
+    """
+
+    def __init__(self, db_file="study_data.db", writer=None):
+        self.db_file = db_file
+        self.writer = writer or BackgroundWriter()
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)
+        self.conn.executescript(self.SCHEMA)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(log)")]
+        if "plan_key" in columns:
+            self.conn.executescript(self.REKEY_LOG)
+        self.plans = {}
+        self._data_version = None  # PRAGMA data_version，其他連線提交變更時會改變
+        self._ops = []  # 尚未寫入的 (sql, params)
+        self._db_lock = threading.Lock()
+        self._log_day = None
+        self._log_ids = set()  # _log_day 當天已簽到的計劃 id
+        self._history = {}  # plan_id -> CheckinBits，第一次查詢時才讀取
+
+    PLAN_COLUMNS = "rowid, name, due_date, daily, weekly, create_date, status"
+
+    # 把計劃搬到 plans_archive，rowid (id) 不變
+    ARCHIVE_PLAN = ("INSERT OR REPLACE INTO plans_archive "
+                    "(rowid, name, due_date, daily, weekly, create_date, weekday, status) "
+                    "SELECT rowid, name, due_date, daily, weekly, create_date, weekday, 'Completed' "
+                    "FROM plans WHERE {where}")
+
+    @staticmethod
+    def _plan_from_row(row):
+        rowid, name, due_date, daily, weekly, create_date, status = row
+        return Plan.from_dict({
+            "id": rowid,
+            "name": name,
+            "due_date": due_date,
+            "daily": daily,
+            "weekly": weekly,
+            "create_date": create_date,
+            "status": status
+        })
+
+    def load_plans(self):
+        with self._db_lock:
+            with self.conn:
+                # 舊資料中已完成的計劃移到封存資料表
+                self.conn.execute(self.ARCHIVE_PLAN.format(where="status = 'Completed'"))
+                self.conn.execute("DELETE FROM plans WHERE status = 'Completed'")
+                # 封存與已刪除的計劃也佔用 id：計數器要大於兩個資料表中的最大值
+                (last_id,) = self.conn.execute(
+                    "SELECT max(id) FROM (SELECT max(rowid) AS id FROM plans "
+                    "UNION ALL SELECT max(rowid) FROM plans_archive "
+                    "UNION ALL SELECT CAST(value AS INTEGER) - 1 FROM meta WHERE key = 'next_id')").fetchone()
+                self.conn.execute(self.SAVE_NEXT_ID, (str((last_id or 0) + 1),))
+            rows = self.conn.execute(
+                f"SELECT {self.PLAN_COLUMNS} FROM plans ORDER BY rowid").fetchall()
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'history'").fetchone() is None:
+                # 升級或從 JSON 匯入後第一次開啟：由 log 建立 history 資料表
+                with self.conn:
+                    self._rebuild_history()
+                    self.conn.execute("INSERT INTO meta (key, value) VALUES ('history', '1')")
+            (self._data_version,) = self.conn.execute("PRAGMA data_version").fetchone()
+        self.plans = {row[0]: self._plan_from_row(row) for row in rows}
+        return self.plans
+
+    # 日期轉為序數 (date.toordinal)，由 SQLite 計算
+    LOG_ORDINALS = ("SELECT plan_id, CAST(julianday(date) - 1721424.5 AS INTEGER) FROM log {where} "
+                    "ORDER BY plan_id")
+    SAVE_HISTORY = "INSERT OR REPLACE INTO history (plan_id, start, bits) VALUES (?, ?, ?)"
+
+    def _rebuild_history(self, plan_ids=None):
+        """由 log 重建 history 資料表中 plan_ids（None 為全部）的列；呼叫端持有 _db_lock 並在交易中"""
+        if plan_ids is None:
+            self.conn.execute("DELETE FROM history")
+            queries = [(self.LOG_ORDINALS.format(where=""), ())]
+        else:
+            plan_ids = sorted(plan_ids)
+            chunks = [plan_ids[index:index + 500] for index in range(0, len(plan_ids), 500)]
+            queries = []
+            for chunk in chunks:
+                where = f"WHERE plan_id IN ({', '.join('?' * len(chunk))})"
+                self.conn.execute(f"DELETE FROM history {where}", chunk)
+                queries.append((self.LOG_ORDINALS.format(where=where), chunk))
+        for sql, params in queries:
+            rows = self.conn.execute(sql, params)
+            for plan_id, group in itertools.groupby(rows, key=lambda row: row[0]):
+                bits = CheckinBits.from_ordinals([day for _, day in group])
+                self.conn.execute(self.SAVE_HISTORY, (plan_id, bits.start, bits.to_bytes()))
+
+    # 下一個要分配的 id，刪除最新的計劃後 id 也不會被重複使用
+    SAVE_NEXT_ID = "INSERT OR REPLACE INTO meta (key, value) VALUES ('next_id', ?)"
+
+    def _reserve_ids(self, count):
+        """由計數器取得 count 個連續的 id，回傳第一個；呼叫端持有 _db_lock 並在交易中
+
+        先 UPDATE 取得寫入鎖再讀取，其他程式不會在中間取得相同的 id。
+        """
+        self.conn.execute("UPDATE meta SET value = CAST(value AS INTEGER) + ? WHERE key = 'next_id'", (count,))
+        (next_id,) = self.conn.execute("SELECT CAST(value AS INTEGER) FROM meta WHERE key = 'next_id'").fetchone()
+        return next_id - count
+
+    def _sync(self):
+        """其他程式（例如命令列工具）提交過變更時，丟棄簽到的快取"""
+        with self._db_lock:
+            (version,) = self.conn.execute("PRAGMA data_version").fetchone()
+        if version == self._data_version:
+            return
+        self.flush()  # 快取中待寫入的 history 先寫入，重新讀取時才不會遺失
+        self._data_version = version
+        self._log_day = None
+        self._log_ids = set()
+        self._history = {}
+
+    def _execute(self, sql, params):
+        """排入一個寫入操作，背景執行緒會把累積的操作放在同一個交易中"""
+        self._execute_all([(sql, params)])
+
+    def _execute_all(self, ops):
+        """排入多個必須在同一個交易中的寫入操作"""
+        with self._db_lock:
+            self._ops.extend(ops)
+        self.writer.schedule(self.db_file, self._commit)
+
+    def _commit(self):
+        with self._db_lock:
+            ops, self._ops = self._ops, []
+            if not ops:
+                return
+            with self.conn:
+                for sql, params in ops:
+                    self.conn.execute(sql, params)
+
+    @staticmethod
+    def _insert_params(plan):
+        return (plan.id, plan.name, plan.due_date, int(plan.daily), int(plan.weekly),
+                plan.create_date, plan.created % 7, plan.status_name)
+
+    INSERT_PLAN = ("INSERT INTO plans (rowid, name, due_date, daily, weekly, create_date, weekday, status) "
+                   "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+
+    def add_plan(self, plan):
+        # 只有分配 id 是同步的一個小交易，新增本身在背景寫入，刪除時也不必等背景寫入完成
+        with self._db_lock:
+            with self.conn:
+                plan.id = self._reserve_ids(1)
+        self._execute(self.INSERT_PLAN, self._insert_params(plan))
+        self.plans[plan.id] = plan
+
+    def import_plans(self, batches):
+        """大量新增：batches 逐批產生計劃，逐批寫入同一個交易，最後只提交一次
+
+        已完成的計劃直接寫入 plans_archive，回傳加入進行中清單的計劃。
+        中途失敗時交易回復，記憶體中的計劃與 id 也不會改變。
+        """
+        self.flush()
+        insert_archive = self.INSERT_PLAN.replace("INTO plans", "INTO plans_archive")
+        added = []
+        with self._db_lock:
+            with self.conn:
+                for batch in batches:
+                    first = self._reserve_ids(len(batch))
+                    for offset, plan in enumerate(batch):
+                        plan.id = first + offset
+                    active = [plan for plan in batch if not plan.completed]
+                    self.conn.executemany(self.INSERT_PLAN, (self._insert_params(plan) for plan in active))
+                    self.conn.executemany(insert_archive, (self._insert_params(plan)
+                                                           for plan in batch if plan.completed))
+                    added.extend(active)
+        # 交易已提交才更新記憶體
+        for plan in added:
+            self.plans[plan.id] = plan
+        return added
+
+    def delete_plan(self, plan):
+        # 計劃與它的簽到記錄在同一個交易中刪除
+        self._execute_all([("DELETE FROM plans WHERE rowid = ?", (plan.id,)),
+                           ("DELETE FROM log WHERE plan_id = ?", (plan.id,)),
+                           ("DELETE FROM history WHERE plan_id = ?", (plan.id,))])
+        del self.plans[plan.id]
+        self._history.pop(plan.id, None)
+        self._log_ids.discard(plan.id)
+
+    def archive_plans(self, plans):
+        """把已完成的計劃移到 plans_archive，每個計劃一組單筆操作"""
+        for plan in plans:
+            self._execute_all([(self.ARCHIVE_PLAN.format(where="rowid = ?"), (plan.id,)),
+                               ("DELETE FROM plans WHERE rowid = ?", (plan.id,))])
+            del self.plans[plan.id]
+
+    def archived_count(self):
+        self.flush()
+        with self._db_lock:
+            return self.conn.execute("SELECT count(*) FROM plans_archive").fetchone()[0]
+
+    def archived_ids(self):
+        self.flush()
+        with self._db_lock:
+            return {plan_id for (plan_id,) in self.conn.execute("SELECT rowid FROM plans_archive")}
+
+    def load_archive(self, offset=0, limit=50):
+        """分頁讀取封存的計劃，截止日較晚的在前"""
+        self.flush()
+        with self._db_lock:
+            rows = self.conn.execute(
+                f"SELECT {self.PLAN_COLUMNS} FROM plans_archive "
+                "ORDER BY due_date DESC, rowid DESC LIMIT ? OFFSET ?", (limit, offset)).fetchall()
+        return [self._plan_from_row(row) for row in rows]
+
+    def refresh_log(self, today=None):
+        """一次查出今天已簽到的計劃，之後 has_log 只查記憶體"""
+        self._sync()
+        if today is None or today == self._log_day:
+            return
+        self.flush()
+        with self._db_lock:
+            rows = self.conn.execute("SELECT plan_id FROM log WHERE date = ?", (today,)).fetchall()
+        self._log_day = today
+        self._log_ids = {plan_id for (plan_id,) in rows}
+
+    def has_log(self, plan_id, date):
+        if date == self._log_day:
+            return plan_id in self._log_ids
+        self.flush()
+        with self._db_lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM log WHERE plan_id = ? AND date = ?", (plan_id, date)).fetchone()
+        return row is not None
+
+    def add_log(self, plan_id, date):
+        if date == self._log_day:
+            if plan_id in self._log_ids:
+                return False
+            self._log_ids.add(plan_id)
+        plan = self.plans.get(plan_id)
+        day = to_ordinal(date)
+        bits = self._load_history(plan_id, plan.created if plan is not None else day)
+        if not bits.add(day):
+            return False
+        # log 與 history 在同一個交易中更新
+        self._execute_all([("INSERT OR IGNORE INTO log (plan_id, date) VALUES (?, ?)", (plan_id, date)),
+                           (self.SAVE_HISTORY, (plan_id, bits.start, bits.to_bytes()))])
+        return True
+
+    def _load_history(self, plan_id, start):
+        bits = self._history.get(plan_id)
+        if bits is None:
+            # 待寫入的 history 都已在快取中，不需要先 flush
+            with self._db_lock:
+                row = self.conn.execute("SELECT start, bits FROM history WHERE plan_id = ?", (plan_id,)).fetchone()
+            bits = CheckinBits(*row) if row is not None else CheckinBits(start)
+            bits.rebase(start)
+            self._history[plan_id] = bits
+        return bits
+
+    def history(self, plan):
+        """計劃的簽到記錄 (CheckinBits)，讀取一次後由 add_log 同步更新"""
+        return self._load_history(plan.id, plan.created)
+
+    def histories(self):
+        """所有進行中計劃的簽到記錄 {plan.id: CheckinBits}，尚未讀取的以一次查詢讀入"""
+        self._sync()
+        missing = [plan_id for plan_id in self.plans if plan_id not in self._history]
+        if missing:
+            self.flush()
+            with self._db_lock:
+                rows = self.conn.execute("SELECT plan_id, start, bits FROM history").fetchall()
+            for plan_id, start, data in rows:
+                plan = self.plans.get(plan_id)
+                if plan is not None and plan_id not in self._history:
+                    bits = self._history[plan_id] = CheckinBits(start, data)
+                    bits.rebase(plan.created)
+        return {plan.id: self.history(plan) for plan in self.plans.values()}
+
+    def import_logs(self, batches):
+        """大量新增簽到：batches 逐批產生 (plan_id, 日期)，同一個交易，回傳新增的筆數"""
+        self.flush()
+        touched = set()
+        added = 0
+        with self._db_lock:
+            with self.conn:
+                for batch in batches:
+                    before = self.conn.total_changes
+                    self.conn.executemany("INSERT OR IGNORE INTO log (plan_id, date) VALUES (?, ?)", batch)
+                    added += self.conn.total_changes - before
+                    touched.update(plan_id for plan_id, _ in batch)
+                self._rebuild_history(touched)
+        # 記憶體中的快取下次查詢時重新讀取
+        self._log_day = None
+        self._history = {}
+        return added
+
+    def iter_logs(self, batch_size=1000):
+        """逐筆列出 (plan_id, 日期)，分批從資料庫讀取"""
+        self.flush()
+        last = (-1, "")
+        while True:
+            with self._db_lock:
+                rows = self.conn.execute(
+                    "SELECT plan_id, date FROM log WHERE (plan_id, date) > (?, ?) "
+                    "ORDER BY plan_id, date LIMIT ?", (*last, batch_size)).fetchall()
+            if not rows:
+                return
+            yield from rows
+            last = rows[-1]
+
+    def flush(self):
+        self.writer.flush()
+
+    def close(self):
+        self.writer.close()
+        self.conn.close()
+
+
+def migrate_json_to_sqlite(store, data_file="study_data.json", log_file="log.json",
+                           archive_file="study_archive.jsonl"):
+    """一次性把 study_data.json / log.json 匯入 SQLite，已匯入過則略過"""
+    conn = store.conn
+    if conn.execute("SELECT 1 FROM meta WHERE key = 'migrated'").fetchone():
+        return False
+    log = LogStore(log_file)
+    log.refresh()
+    data = _read_json(data_file) if os.path.exists(data_file) else None
+    plans, _, _ = _upgrade(data or {}, log)  # 只改寫記憶體，不改動原本的 JSON 檔案
+    with conn:
+        conn.executemany(store.INSERT_PLAN, (store._insert_params(plan) for plan in plans.values()))
+        conn.executemany(store.INSERT_PLAN.replace("INTO plans", "INTO plans_archive"),
+                         (store._insert_params(plan) for plan in _read_archive(archive_file).values()))
+        conn.executemany(
+            "INSERT OR IGNORE INTO log (plan_id, date) VALUES (?, ?)",
+            ((int(key), date) for key, date in log.entries()))
+        conn.execute("INSERT INTO meta (key, value) VALUES ('migrated', ?)",
+                     (datetime.now().strftime("%Y-%m-%d %H:%M:%S"),))
+    return True
+
+
+def open_store(kind=None):
+    """依 STUDY_STORAGE 環境變數選擇儲存後端 (sqlite / json)"""
+    kind = kind or os.environ.get("STUDY_STORAGE", "sqlite")
+    if kind == "json":
+        return JsonStore()
+    if kind == "sqlite":
+        store = SqliteStore()
+        migrate_json_to_sqlite(store)
+        return store
+    raise ValueError(f"未知的儲存後端: {kind}")
@@ -0,0 +1,138 @@
+"""學習計劃的命令列工具，不需要 Kivy，與 App 共用資料檔
+
+    python -m study_cli list                 列出進行中的計劃
+    python -m study_cli today                今天需要完成的計劃
+    python -m study_cli done 計劃id          記錄今天已完成
+    python -m study_cli add 名稱 YYYY-MM-DD (--daily | --weekly)
+    python -m study_cli import plans.csv [--history history.csv]
+    python -m study_cli export plans.jsonl [--history history.jsonl]
+
+匯入/匯出依副檔名使用 CSV 或 JSONL（欄位見 study_io.PLAN_FIELDS / HISTORY_FIELDS）。
+"""
+import argparse
+import sys
+
+import study_io
+from storage import StoreBusyError
+from study_core import StudyCore, frequency_name
+
+
+def cmd_list(core, args):
+    if not core.plans:
+        print("目前沒有建立的學習計劃。")
+    for plan in core.plans.values():
+        print(f"{plan.id:>5}  {plan.name} (到期日: {plan.due_date}) - 週期: {frequency_name(plan)}")
+    return 0
+
+
+def cmd_today(core, args):
+    due = core.due_today()
+    if not due:
+        print("今天沒有需要完成的計劃。")
+    for plan in due:
+        mark = "v" if core.check_log(plan) else " "
+        print(f"[{mark}] {plan.id:>5}  {plan.name}")
+    return 0
+
+
+def cmd_done(core, args):
+    plan = core.get(args.plan_id)
+    if plan is None:
+        print(f"找不到計劃 {args.plan_id}", file=sys.stderr)
+        return 1
+    if not core.is_due(plan):
+        print(f"{plan.name} 今天不需要完成", file=sys.stderr)
+        return 1
+    if core.save_log(plan):
+        print(f"已完成: {plan.name}")
+    else:
+        print(f"今天已經記錄過: {plan.name}")
+    return 0
+
+
+def cmd_add(core, args):
+    try:
+        plan = core.add_plan(args.name, args.due_date, args.daily, args.weekly)
+    except ValueError as error:
+        print(error, file=sys.stderr)
+        return 1
+    print(f"已新增 {plan.id}: {plan.name}")
+    return 0
+
+
+def print_errors(result):
+    for row, message in result.errors:
+        print(f"  第 {row} 列: {message}", file=sys.stderr)
+    if result.error_count > len(result.errors):
+        print(f"  …另外 {result.error_count - len(result.errors)} 筆錯誤", file=sys.stderr)
+
+
+def cmd_import(core, args):
+    try:
+        id_map = None
+        if args.plans:
+            result = study_io.import_plans(core.model, args.plans)
+            print(f"計劃: {result.summary()}")
+            print_errors(result)
+            id_map = result.id_map
+        if args.history:
+            result = study_io.import_history(core.store, args.history, id_map)
+            print(f"簽到記錄: {result.summary()}")
+            print_errors(result)
+    except (OSError, ValueError) as error:
+        print(error, file=sys.stderr)
+        return 1
+    return 0
+
+
+def cmd_export(core, args):
+    try:
+        if args.plans:
+            print(f"計劃: {study_io.export_plans(core.model, args.plans)} 筆")
+        if args.history:
+            print(f"簽到記錄: {study_io.export_history(core.store, args.history)} 筆")
+    except (OSError, ValueError) as error:
+        print(error, file=sys.stderr)
+        return 1
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="study_cli", description="學習計劃命令列工具")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("list", help="列出進行中的計劃").set_defaults(handler=cmd_list)
+    commands.add_parser("today", help="今天需要完成的計劃").set_defaults(handler=cmd_today)
+    done = commands.add_parser("done", help="記錄今天已完成")
+    done.add_argument("plan_id", type=int)
+    done.set_defaults(handler=cmd_done)
+    add = commands.add_parser("add", help="新增計劃")
+    add.add_argument("name")
+    add.add_argument("due_date", help="YYYY-MM-DD")
+    frequency = add.add_mutually_exclusive_group(required=True)
+    frequency.add_argument("--daily", action="store_true")
+    frequency.add_argument("--weekly", action="store_true")
+    add.set_defaults(handler=cmd_add)
+    for name, handler, help_text in (("import", cmd_import, "由 CSV/JSONL 匯入計劃與簽到記錄"),
+                                     ("export", cmd_export, "匯出計劃與簽到記錄為 CSV/JSONL")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("plans", nargs="?", help="計劃檔 (.csv/.jsonl)")
+        command.add_argument("--history", help="簽到記錄檔 (.csv/.jsonl)")
+        command.set_defaults(handler=handler)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        core = StudyCore()
+    except StoreBusyError as error:  # JSON 模式下 App 正在執行
+        print(error, file=sys.stderr)
+        return 1
+    try:
+        return args.handler(core, args)
+    finally:
+        core.close()  # 寫入待寫的資料
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import re
+from datetime import date, datetime
+
+from plan_model import Frequency, Plan, PlanModel
+from storage import open_store
+
+
+def validate_date(date_text):
+    """驗證日期格式 (YYYY-MM-DD)"""
+    if not re.match(r"^\d{4}-\d{2}-\d{2}$", date_text):
+        return False
+    try:
+        datetime.strptime(date_text, "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+
+def frequency_name(plan):
+    return "每日" if plan.daily else "每周"
+
+
+def plan_row(plan):
+    """計劃清單與歷史計劃中一列的資料（按鈕的動作由畫面加上）"""
+    row = {"text": f"{plan.name} (到期日: {plan.due_date}) - 狀態: {plan.status_name} - 週期: {frequency_name(plan)}"}
+    if plan.completed:
+        row["plan"] = plan  # 已封存的計劃不能刪除
+    else:
+        row["button_text"] = "刪除"
+    return row
+
+
+def progress_row(core, plan, today=None):
+    """今日進度清單中一列的資料（按鈕的動作由畫面加上）"""
+    signed_today = core.check_log(plan, today)
+    return {
+        "text": f"今日進度: {plan.name}",
+        "button_text": "已完成" if signed_today else "完成今日進度",
+        "disabled": signed_today,  # 禁用按鈕如果已簽到
+    }
+
+
+class StudyCore:
+    """計劃的新增/刪除/查詢與每日簽到，不需要 Kivy
+
+    StudyHelperApp 與命令列工具 (study_cli) 共用，讀寫相同的資料檔。
+    輸入錯誤時以 ValueError 回報，訊息可以直接顯示給使用者。
+    """
+
+    def __init__(self, store=None):
+        self.store = store or open_store()  # 儲存後端 (STUDY_STORAGE=sqlite/json)
+        self.model = PlanModel(self.store)
+        self.plans = self.model.plans
+        self.model.expire_overdue(date.today())  # 過期的計劃移到封存
+
+    def add_plan(self, name, due_date, daily, weekly, today=None):
+        """檢查輸入並新增計劃，回傳新增的 Plan"""
+        if not name:
+            raise ValueError("請輸入學習計劃名稱！")
+        if not validate_date(due_date):
+            raise ValueError("日期格式錯誤！請輸入 YYYY-MM-DD。")
+        if not (daily or weekly):
+            raise ValueError("請選擇每日或每周計劃！")
+        input_date = datetime.strptime(due_date, "%Y-%m-%d").date()
+        today = today or date.today()
+        if input_date < today:
+            raise ValueError("不要當時空旅人")
+        frequency = Frequency.DAILY if daily else Frequency.WEEKLY
+        plan = Plan(name, input_date.toordinal(), frequency, today.toordinal())
+        self.model.add(plan)
+        return plan
+
+    def delete_plan(self, plan):
+        self.model.remove(plan)
+
+    def get(self, plan_id):
+        return self.model.get(plan_id)
+
+    def due_today(self, today=None):
+        """今天需要完成的計劃"""
+        today = today or date.today()
+        self.store.refresh_log(today.strftime("%Y-%m-%d"))  # 有變動才重新讀取
+        return self.model.schedule.due_on(today)
+
+    def is_due(self, plan, today=None):
+        return self.model.schedule.is_due(plan, today or date.today())
+
+    def save_log(self, plan, today=None):
+        """記錄計劃今天已完成，回傳是否為新的記錄"""
+        today_text = (today or date.today()).strftime("%Y-%m-%d")
+        self.store.refresh_log(today_text)  # 讓後端知道今天已有的記錄，重複記錄時回傳 False
+        return self.store.add_log(plan.id, today_text)
+
+    def check_log(self, plan, today=None):
+        """計劃今天是否已完成"""
+        today = today or date.today()
+        return self.store.has_log(plan.id, today.strftime("%Y-%m-%d"))
+
+    def close(self):
+        self.store.close()
@@ -0,0 +1,268 @@
+import csv
+import functools
+import json
+import logging
+import os
+from datetime import date
+
+from plan_model import COMPLETED, PENDING, STATUS_NAMES, Frequency, Plan
+from study_core import validate_date
+
+log = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000  # 每批驗證與寫入的筆數
+MAX_ERRORS = 100  # 最多保留的錯誤訊息，超過的只計數
+PLAN_FIELDS = ("id", "name", "due_date", "daily", "weekly", "create_date", "status")
+HISTORY_FIELDS = ("plan_id", "date")
+
+_TRUE = {"1", "true", "yes", "y", "是"}
+_FALSE = {"", "0", "false", "no", "n", "否"}
+
+
+def file_format(path):
+    """依副檔名判斷格式：csv 或 jsonl"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"不支援的檔案格式：{path}（請使用 .csv 或 .jsonl）")
+
+
+class ImportResult:
+    """匯入的結果：新增/封存/重複的筆數與每一列的錯誤 [(列號, 訊息)]"""
+
+    def __init__(self):
+        self.added = 0
+        self.archived = 0
+        self.duplicates = 0
+        self.errors = []
+        self.error_count = 0
+        self.id_map = {}  # 檔案中的計劃 id -> 新的 id，匯入簽到記錄時使用
+
+    def error(self, row, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append((row, message))
+
+    def summary(self):
+        text = f"新增 {self.added} 筆"
+        if self.archived:
+            text += f"，封存 {self.archived} 筆"
+        if self.duplicates:
+            text += f"，略過重複 {self.duplicates} 筆"
+        if self.error_count:
+            text += f"，錯誤 {self.error_count} 筆"
+        return text
+
+
+def _read_rows(path):
+    """逐列讀取，產生 (列號, 字典)；無法解析的列為 (列號, None)"""
+    if file_format(path) == "csv":
+        with open(path, "r", newline="", encoding="utf-8-sig") as file:
+            reader = csv.DictReader(file)
+            for record in reader:
+                yield reader.line_num, record
+        return
+    with open(path, "r", encoding="utf-8") as file:
+        for number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                record = None
+            yield number, record if isinstance(record, dict) else None
+
+
+@functools.lru_cache(maxsize=4096)
+def _ordinal(text):
+    """YYYY-MM-DD 轉為序數，格式錯誤時為 None；同一批資料的日期大多重複，結果快取起來"""
+    if not validate_date(text):
+        return None
+    return date.fromisoformat(text).toordinal()
+
+
+def _date(record, field, default=None):
+    text = str(record.get(field) or "").strip()
+    if not text and default is not None:
+        return default
+    ordinal = _ordinal(text)
+    if ordinal is None:
+        raise ValueError(f"{field} 日期格式錯誤！請輸入 YYYY-MM-DD。")
+    return ordinal
+
+
+def _flag(record, field):
+    value = record.get(field)
+    if isinstance(value, bool):
+        return value
+    text = str(value if value is not None else "").strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(f"{field} 必須是 true 或 false")
+
+
+def parse_plan(record, today):
+    """由一列資料建立 Plan（today 為日期序數），資料錯誤時 ValueError
+
+    截止日已過的計劃直接標為 Completed，匯入後放入封存。
+    """
+    if record is None:
+        raise ValueError("無法解析的資料列")
+    name = str(record.get("name") or "").strip()
+    if not name:
+        raise ValueError("請輸入學習計劃名稱！")
+    due = _date(record, "due_date")
+    created = _date(record, "create_date", default=today)
+    daily, weekly = _flag(record, "daily"), _flag(record, "weekly")
+    if not (daily or weekly):
+        raise ValueError("請選擇每日或每周計劃！")
+    status = str(record.get("status") or STATUS_NAMES[PENDING]).strip()
+    if status not in STATUS_NAMES:
+        raise ValueError(f"未知的狀態：{status}")
+    frequency = Frequency.DAILY if daily else Frequency.WEEKLY
+    completed = status == STATUS_NAMES[COMPLETED] or due < today
+    return Plan(name, due, frequency, created, COMPLETED if completed else PENDING)
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_plans(model, path, today=None, batch_size=BATCH_SIZE):
+    """由 CSV/JSONL 匯入計劃，回傳 ImportResult
+
+    逐批讀取與驗證，整個檔案只提交一次，畫面在最後一次更新（PlanModel.import_plans）；
+    有錯誤的列略過並記錄列號。
+    """
+    today = (today or date.today()).toordinal()
+    result = ImportResult()
+    parsed = []  # (檔案中的 id, plan)
+
+    def batches():
+        for batch in _batches(_valid_plans(path, today, result), batch_size):
+            parsed.extend(batch)
+            yield [plan for _, plan in batch]
+
+    result.added = len(model.import_plans(batches()))
+    # 全部寫入後儲存後端才分配好新的 id
+    result.id_map = {old_id: plan.id for old_id, plan in parsed if old_id is not None}
+    log.info("import plans %s: %s", path, result.summary())
+    return result
+
+
+def _valid_plans(path, today, result):
+    for row, record in _read_rows(path):
+        try:
+            plan = parse_plan(record, today)
+        except ValueError as error:
+            result.error(row, str(error))
+            continue
+        if plan.completed:
+            result.archived += 1
+        yield _plan_id(record, "id"), plan
+
+
+def _plan_id(record, field):
+    try:
+        return int(record.get(field))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_checkin(record, plan_ids, id_map=None):
+    """由一列資料取得 (plan_id, YYYY-MM-DD)，資料錯誤時 ValueError
+
+    有 id_map 時 plan_id 是匯入檔案中的 id，否則必須在 plan_ids（進行中與已封存的計劃）中。
+    """
+    if record is None:
+        raise ValueError("無法解析的資料列")
+    plan_id = _plan_id(record, "plan_id")
+    if plan_id is None:
+        raise ValueError("plan_id 必須是整數")
+    if id_map is not None:
+        if plan_id not in id_map:
+            raise ValueError(f"找不到計劃 {plan_id}")
+        plan_id = id_map[plan_id]
+    elif plan_id not in plan_ids:
+        raise ValueError(f"找不到計劃 {plan_id}")
+    day = _date(record, "date")
+    return plan_id, date.fromordinal(day).isoformat()
+
+
+def import_history(store, path, id_map=None, batch_size=BATCH_SIZE):
+    """由 CSV/JSONL 匯入簽到記錄 (plan_id, date)，回傳 ImportResult
+
+    與計劃一起匯入時傳入 import_plans 結果的 id_map，把檔案中的 id 換成新的 id。
+    已存在的記錄算作重複，不會新增。
+    """
+    result = ImportResult()
+    valid = 0
+    # 只匯入簽到記錄時，export_history 也會寫出已封存計劃的記錄
+    plan_ids = None if id_map is not None else set(store.plans) | store.archived_ids()
+
+    def checkins():
+        nonlocal valid
+        for row, record in _read_rows(path):
+            try:
+                checkin = parse_checkin(record, plan_ids, id_map)
+            except ValueError as error:
+                result.error(row, str(error))
+                continue
+            valid += 1
+            yield checkin
+
+    result.added = store.import_logs(_batches(checkins(), batch_size))
+    result.duplicates = valid - result.added
+    log.info("import history %s: %s", path, result.summary())
+    return result
+
+
+def _write_rows(path, fields, records):
+    """逐筆寫出，回傳筆數"""
+    count = 0
+    if file_format(path) == "csv":
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=fields)
+            writer.writeheader()
+            for record in records:
+                writer.writerow(record)
+                count += 1
+        return count
+    with open(path, "w", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
+def _all_plans(model, page_size):
+    yield from list(model.plans.values())
+    offset = 0
+    while True:
+        page = model.archived(offset, page_size)
+        yield from page
+        if len(page) < page_size:
+            return
+        offset += len(page)
+
+
+def export_plans(model, path, page_size=BATCH_SIZE):
+    """寫出進行中與已封存的計劃，封存分頁讀取，回傳筆數"""
+    return _write_rows(path, PLAN_FIELDS, (plan.to_dict() for plan in _all_plans(model, page_size)))
+
+
+def export_history(store, path):
+    """寫出所有簽到記錄 (plan_id, date)，回傳筆數"""
+    return _write_rows(path, HISTORY_FIELDS,
+                       ({"plan_id": plan_id, "date": day} for plan_id, day in store.iter_logs()))
@@ -0,0 +1,113 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plan_model import COMPLETED, Frequency, Plan, PlanModel  # noqa: E402
+from storage import JsonStore, SqliteStore  # noqa: E402
+from study_io import import_plans  # noqa: E402
+
+TODAY = 738000  # 日期序數
+
+
+def json_store(folder):
+    return JsonStore(str(folder / "study_data.json"), str(folder / "log.json"),
+                     archive_file=str(folder / "study_archive.jsonl"))
+
+
+def sqlite_store(folder):
+    return SqliteStore(str(folder / "study_data.db"))
+
+
+STORES = [json_store, sqlite_store]
+
+
+def make_plan(number, status=0):
+    return Plan(f"計劃 {number}", TODAY + 30, Frequency.DAILY, TODAY, status)
+
+
+def failing_batches(count, size):
+    """產生 count 批計劃後讀取失敗，模擬檔案中途的錯誤"""
+    for batch in range(count):
+        yield [make_plan(batch * size + index, COMPLETED if index == 0 else 0) for index in range(size)]
+    raise OSError("讀取中斷")
+
+
+class Listener:
+    def __init__(self):
+        self.inserted = []
+
+    def on_insert(self, plan):
+        self.inserted.append(plan)
+
+    def on_insert_many(self, plans):
+        self.inserted.extend(plans)
+
+    def on_remove(self, plan):
+        pass
+
+    def on_update(self, plan):
+        pass
+
+
+@pytest.mark.parametrize("open_store", STORES)
+def test_failed_import_leaves_store_unchanged(tmp_path, open_store):
+    store = open_store(tmp_path)
+    model = PlanModel(store)
+    model.add(make_plan(0))
+    listener = Listener()
+    model.bind(listener)
+
+    with pytest.raises(OSError):
+        model.import_plans(failing_batches(3, 10))
+
+    assert list(model.plans) == [1]
+    assert listener.inserted == []
+    assert store.archived_count() == 0
+    model.add(make_plan(1))
+    assert sorted(model.plans) == [1, 2]
+    store.close()
+
+    reopened = open_store(tmp_path)
+    assert sorted(reopened.load_plans()) == [1, 2]
+    assert reopened.archived_count() == 0
+    reopened.close()
+
+
+@pytest.mark.parametrize("open_store", STORES)
+def test_invalid_bytes_late_in_file(tmp_path, open_store):
+    path = tmp_path / "plans.csv"
+    rows = [f"{number},計劃 {number},2030-01-01,true,false,2020-01-01,Pending\n" for number in range(3000)]
+    data = "id,name,due_date,daily,weekly,create_date,status\n".encode() + "".join(rows).encode()
+    path.write_bytes(data + b"9999,\xff\xfe,2030-01-01,true,false,2020-01-01,Pending\n")
+    store = open_store(tmp_path)
+    model = PlanModel(store)
+
+    with pytest.raises(UnicodeDecodeError):
+        import_plans(model, str(path), batch_size=100)
+
+    assert model.plans == {}
+    model.add(make_plan(0))
+    store.close()
+    reopened = open_store(tmp_path)
+    assert list(reopened.load_plans()) == [1]
+    reopened.close()
+
+
+@pytest.mark.parametrize("open_store", STORES)
+def test_import_maps_file_ids(tmp_path, open_store):
+    path = tmp_path / "plans.csv"
+    path.write_text("id,name,due_date,daily,weekly,create_date,status\n"
+                    "7,英文,2030-01-01,true,false,2020-01-01,Pending\n"
+                    "9,數學,2030-01-01,false,true,2020-01-01,Pending\n", encoding="utf-8")
+    store = open_store(tmp_path)
+    model = PlanModel(store)
+    model.add(make_plan(0))
+
+    result = import_plans(model, str(path), batch_size=1)
+
+    assert result.added == 2
+    assert result.id_map == {7: 2, 9: 3}
+    store.close()
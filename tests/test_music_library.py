@@ -0,0 +1,41 @@
+import builtins
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import persistence  # noqa: E402
+from music_library import INDEX_VERSION, MusicLibrary  # noqa: E402
+
+
+def test_index_with_cjk_names_round_trips(tmp_path, monkeypatch):
+    folder = tmp_path / "音樂"
+    folder.mkdir()
+    (folder / "鬧鐘.wav").write_bytes(b"")
+    cache_file = str(tmp_path / "music_index.json")
+    # 模擬 Windows 的 cp950 語系：沒有指定 encoding 的 open 會以 cp950 寫入
+    def cp950_open(file, mode="r", *args, **kwargs):
+        if "b" not in mode and "encoding" not in kwargs:
+            kwargs["encoding"] = "cp950"
+        return builtins.open(file, mode, *args, **kwargs)
+
+    monkeypatch.setattr(persistence, "open", cp950_open, raising=False)
+
+    library = MusicLibrary([str(folder)], cache_file)
+    assert library.scan()
+    with open(cache_file, "rb") as file:
+        file.read().decode("utf-8")
+
+    reopened = MusicLibrary([str(folder)], cache_file)
+    assert [os.path.basename(path) for path, _ in reopened.tracks()] == ["鬧鐘.wav"]
+
+
+def test_index_in_other_encoding_is_rescanned(tmp_path):
+    cache_file = tmp_path / "music_index.json"
+    data = {"version": INDEX_VERSION, "dirs": {"C:\\音樂": {}}}
+    cache_file.write_bytes(json.dumps(data, ensure_ascii=False).encode("cp950"))
+
+    library = MusicLibrary([], str(cache_file))
+    assert library.tracks() == []
+    assert library._dirs == {}
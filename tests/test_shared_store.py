@@ -0,0 +1,81 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import storage  # noqa: E402
+from plan_model import Frequency, Plan  # noqa: E402
+from storage import JsonStore, SqliteStore, StoreBusyError  # noqa: E402
+
+TODAY = 738000  # 日期序數
+
+
+def make_plan(name):
+    return Plan(name, TODAY + 30, Frequency.DAILY, TODAY)
+
+
+def test_sqlite_ids_are_shared_between_processes(tmp_path):
+    db_file = str(tmp_path / "study_data.db")
+    app, cli = SqliteStore(db_file), SqliteStore(db_file)
+    app.load_plans()
+    app.add_plan(make_plan("App 1"))
+    app.flush()
+
+    cli.load_plans()
+    cli_plan = make_plan("命令列")
+    cli.add_plan(cli_plan)
+    cli.close()
+
+    app_plan = make_plan("App 2")
+    app.add_plan(app_plan)
+    app.flush()
+    assert cli_plan.id != app_plan.id
+    app.close()
+
+    reopened = SqliteStore(db_file)
+    assert sorted(plan.name for plan in reopened.load_plans().values()) == ["App 1", "App 2", "命令列"]
+    reopened.close()
+
+
+def test_sqlite_sees_checkins_from_other_process(tmp_path):
+    db_file = str(tmp_path / "study_data.db")
+    app = SqliteStore(db_file)
+    app.load_plans()
+    plan = make_plan("英文")
+    app.add_plan(plan)
+    app.flush()
+    today = "2021-08-01"
+    app.refresh_log(today)
+    assert not app.has_log(plan.id, today)
+    assert app.history(plan).count() == 0
+
+    cli = SqliteStore(db_file)
+    cli.load_plans()
+    assert cli.add_log(plan.id, today)
+    cli.close()
+
+    app.refresh_log(today)
+    assert app.has_log(plan.id, today)
+    assert not app.add_log(plan.id, today)
+    assert app.history(plan).count() == 1
+    app.close()
+
+
+def test_json_store_is_locked_while_open(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "LOCK_TIMEOUT", 0)
+
+    def open_json():
+        return JsonStore(str(tmp_path / "study_data.json"), str(tmp_path / "log.json"),
+                         archive_file=str(tmp_path / "study_archive.jsonl"))
+
+    app = open_json()
+    app.load_plans()
+    cli = open_json()
+    with pytest.raises(StoreBusyError):
+        cli.load_plans()
+    app.close()
+
+    cli.load_plans()
+    cli.close()
@@ -0,0 +1,31 @@
+import os
+import sys
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plan_model import Frequency, Plan, PlanModel  # noqa: E402
+from stats import StatsModel  # noqa: E402
+from storage import JsonStore  # noqa: E402
+
+
+def open_model(folder):
+    store = JsonStore(str(folder / "study_data.json"), str(folder / "log.json"),
+                      archive_file=str(folder / "study_archive.jsonl"))
+    return store, PlanModel(store)
+
+
+def test_week_rate_ignores_days_before_create_date(tmp_path):
+    today = date.today().toordinal()
+    store, model = open_model(tmp_path)
+    plan = Plan("英文", today + 30, Frequency.DAILY, today - 1)
+    model.add(plan)
+    for day in (today - 1, today):
+        store.add_log(plan.id, date.fromordinal(day).isoformat())
+
+    stats = StatsModel(model)
+    stats.build(today)
+
+    assert stats.plan_summary(plan, today)["week_rate"] == 1.0
+    assert stats.overall_summary(today)["week_rate"] == 1.0
+    store.close()
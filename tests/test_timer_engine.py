@@ -0,0 +1,147 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timer_engine import TimerEngine  # noqa: E402
+
+
+class FakeClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class FakeEvent:
+    def __init__(self, callback, due):
+        self.callback = callback
+        self.due = due
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class FakeScheduler:
+    """取代 Clock.schedule_once：事件只在測試指定的時間觸發"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.events = []
+
+    def __call__(self, callback, delay):
+        event = FakeEvent(callback, self.clock.now + delay)
+        self.events.append(event)
+        return event
+
+    @property
+    def pending(self):
+        return [event for event in self.events if not event.cancelled]
+
+    def fire(self, at):
+        """把時鐘調到 at，觸發一個已排程的事件（不論是否已到期，模擬提早或延遲喚醒）"""
+        self.clock.now = at
+        event = self.pending[0]
+        event.cancelled = True
+        event.callback(at - event.due)
+
+
+@pytest.fixture
+def engine():
+    clock = FakeClock()
+    scheduler = FakeScheduler(clock)
+    return TimerEngine(scheduler, clock), scheduler, clock
+
+
+def test_late_tick_reports_jitter(engine):
+    timers, scheduler, clock = engine
+    fired = []
+    timers.start("countdown", 10, lambda name, late: fired.append((name, late)))
+    assert scheduler.pending[0].due == 10
+    scheduler.fire(10.3)  # Clock 延遲 0.3 秒才喚醒
+    assert fired == [("countdown", pytest.approx(0.3))]
+    assert not timers.is_running("countdown")
+    assert scheduler.pending == []
+
+
+def test_early_wakeup_rearms_without_firing(engine):
+    timers, scheduler, clock = engine
+    fired = []
+    timers.start("countdown", 10, lambda name, late: fired.append(late))
+    scheduler.fire(9.9)  # 提早喚醒
+    assert fired == []
+    assert timers.remaining("countdown") == pytest.approx(0.1)
+    assert len(scheduler.pending) == 1
+    assert scheduler.pending[0].due == pytest.approx(10)
+    scheduler.fire(10)
+    assert fired == [pytest.approx(0)]
+
+
+def test_remaining_does_not_drift_with_jittery_ticks(engine):
+    timers, scheduler, clock = engine
+    timers.start("countdown", 60, lambda name, late: None)
+    for second, jitter in enumerate((0.02, 0.15, 0.0, 0.4, 0.07), start=1):
+        clock.now = second + jitter
+        assert timers.remaining("countdown") == pytest.approx(60 - second - jitter)
+    assert timers.deadline("countdown") == 60
+
+
+def test_pause_and_resume_keep_remaining_time(engine):
+    timers, scheduler, clock = engine
+    fired = []
+    timers.start("countdown", 10, lambda name, late: fired.append(late))
+    clock.now = 4
+    timers.pause("countdown")
+    assert timers.is_paused("countdown")
+    assert scheduler.pending == []  # 暫停時不佔用 Clock 事件
+    clock.now = 100
+    assert timers.remaining("countdown") == pytest.approx(6)
+    timers.resume("countdown")
+    assert timers.deadline("countdown") == pytest.approx(106)
+    clock.now = 103
+    assert timers.remaining("countdown") == pytest.approx(3)
+    scheduler.fire(106)
+    assert fired == [pytest.approx(0)]
+
+
+def test_expiry_fires_exactly_once(engine):
+    timers, scheduler, clock = engine
+    fired = []
+    timers.start("countdown", 5, lambda name, late: fired.append(name))
+    on_event = scheduler.pending[0].callback
+    scheduler.fire(5)
+    on_event(0)  # 重複或過時的喚醒
+    clock.now = 50
+    on_event(0)
+    assert fired == ["countdown"]
+    assert timers.remaining("countdown") == 0
+
+
+def test_restart_replaces_previous_deadline(engine):
+    timers, scheduler, clock = engine
+    fired = []
+    timers.start("countdown", 5, lambda name, late: fired.append("old"))
+    clock.now = 2
+    timers.start("countdown", 5, lambda name, late: fired.append("new"))
+    assert [event.due for event in scheduler.pending] == [7]
+    scheduler.fire(7)
+    assert fired == ["new"]
+
+
+def test_cancel_from_callback_skips_other_expired_timer(engine):
+    timers, scheduler, clock = engine
+    fired = []
+
+    def first(name, late):
+        fired.append(name)
+        timers.cancel("second")
+
+    timers.start("first", 1, first)
+    timers.start("second", 2, lambda name, late: fired.append(name))
+    scheduler.fire(3)  # 兩個都已到期，第一個回呼取消了第二個
+    assert fired == ["first"]
+    assert scheduler.pending == []
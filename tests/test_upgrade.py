@@ -0,0 +1,66 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_store import LogStore  # noqa: E402
+from storage import JsonStore  # noqa: E402
+
+V1_PLANS = {"plans": [
+    {"name": "英文", "due_date": "2030-01-01", "daily": True, "weekly": False,
+     "create_date": "2021-07-01", "status": "Pending"},
+    {"name": "數學", "due_date": "2030-01-01", "daily": False, "weekly": True,
+     "create_date": "2021-07-01", "status": "Pending"},
+]}
+V1_LOG = {"英文": ["2021-08-01", "2021-08-02"], "數學": ["2021-08-01"]}
+
+
+def write_v1(folder):
+    (folder / "study_data.json").write_text(json.dumps(V1_PLANS), encoding="utf-8")
+    (folder / "log.json").write_text(json.dumps(V1_LOG, ensure_ascii=False), encoding="utf-8")
+
+
+def open_json(folder):
+    return JsonStore(str(folder / "study_data.json"), str(folder / "log.json"),
+                     archive_file=str(folder / "study_archive.jsonl"))
+
+
+def counts(store):
+    return {plan.name: store.history(plan).count() for plan in store.plans.values()}
+
+
+def test_upgrade_rekeys_log(tmp_path):
+    write_v1(tmp_path)
+    store = open_json(tmp_path)
+    store.load_plans()
+    assert counts(store) == {"英文": 2, "數學": 1}
+    store.close()
+
+    reopened = open_json(tmp_path)
+    reopened.load_plans()
+    assert counts(reopened) == {"英文": 2, "數學": 1}
+    reopened.close()
+
+
+def test_crash_before_log_snapshot_keeps_history(tmp_path, monkeypatch):
+    write_v1(tmp_path)
+
+    def crash(self):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(LogStore, "save", crash)
+    store = open_json(tmp_path)
+    with pytest.raises(KeyboardInterrupt):
+        store.load_plans()
+    store.lock.release()
+    monkeypatch.undo()
+
+    with open(tmp_path / "study_data.json", encoding="utf-8") as file:
+        assert json.load(file)["version"] == 2  # 計劃檔已寫入，log 仍以名稱為 key
+    reopened = open_json(tmp_path)
+    reopened.load_plans()
+    assert counts(reopened) == {"英文": 2, "數學": 1}
+    reopened.close()
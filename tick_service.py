@@ -0,0 +1,89 @@
+import collections
+import time
+
+
+class TickService:
+    """所有每秒更新共用的計時來源
+
+    只在整秒（牆上時間）喚醒一次，依序呼叫目前有效的訂閱者 callback(now)。
+    指定 screen 的訂閱只在該頁面顯示時有效；沒有有效訂閱或 App 暫停時
+    不安排任何喚醒。
+
+    schedule_once(callback, delay) 與 kivy.clock.Clock.schedule_once 相同。
+    """
+
+    def __init__(self, schedule_once, clock=time.time):
+        self.schedule_once = schedule_once
+        self.clock = clock
+        self._subscribers = {}  # 名稱 -> (callback, screen)
+        self._visible = set()
+        self._paused = False
+        self._event = None
+        self.wakeups = 0
+        self._recent = collections.deque()  # 最近一分鐘的喚醒時間 (monotonic)
+
+    def _active(self, screen):
+        return not self._paused and (screen is None or screen in self._visible)
+
+    def subscribe(self, name, callback, screen=None):
+        """加入（或取代）訂閱，有效時立刻先呼叫一次"""
+        self._subscribers[name] = (callback, screen)
+        if self._active(screen):
+            callback(self.clock())
+        self._rearm()
+
+    def unsubscribe(self, name):
+        if self._subscribers.pop(name, None) is not None:
+            self._rearm()
+
+    def screen_entered(self, screen):
+        self._visible.add(screen)
+        self._wake(lambda subscriber_screen: subscriber_screen == screen)
+
+    def screen_left(self, screen):
+        self._visible.discard(screen)
+        self._rearm()
+
+    def pause(self):
+        self._paused = True
+        self._rearm()
+
+    def resume(self):
+        self._paused = False
+        self._wake(lambda screen: True)
+
+    def _wake(self, match):
+        """剛變為有效的訂閱者先更新一次，補上停止期間的畫面"""
+        now = self.clock()
+        for callback, screen in list(self._subscribers.values()):
+            if match(screen) and self._active(screen):
+                callback(now)
+        self._rearm()
+
+    def _rearm(self):
+        needed = any(self._active(screen) for _, screen in self._subscribers.values())
+        if not needed:
+            if self._event is not None:
+                self._event.cancel()
+                self._event = None
+        elif self._event is None:
+            # 稍微超過整秒，Clock 提早觸發也會顯示到新的一秒
+            delay = 1.0 - self.clock() % 1.0 + 0.005
+            self._event = self.schedule_once(self._tick, delay)
+
+    def _tick(self, dt=None):
+        self._event = None
+        self.wakeups += 1
+        self._recent.append(time.monotonic())
+        now = self.clock()
+        for callback, screen in list(self._subscribers.values()):
+            if self._active(screen):
+                callback(now)
+        self._rearm()
+
+    def wakeups_per_minute(self):
+        """最近 60 秒內的喚醒次數"""
+        limit = time.monotonic() - 60
+        while self._recent and self._recent[0] < limit:
+            self._recent.popleft()
+        return len(self._recent)
@@ -0,0 +1,118 @@
+import heapq
+import itertools
+import time
+
+
+class _Timer:
+    __slots__ = ("name", "duration", "deadline", "remaining", "callback")
+
+    def __init__(self, name, duration, deadline, callback):
+        self.name = name
+        self.duration = duration
+        self.deadline = deadline  # 暫停時為 None
+        self.remaining = None  # 暫停時剩餘的秒數
+        self.callback = callback
+
+
+class TimerEngine:
+    """多個具名計時器共用的排程器
+
+    每個計時器記錄 time.monotonic() 的絕對截止時間並放入 min-heap，
+    只向 Clock 要求一個指向最近截止時間的一次性事件。剩餘時間都由截止時間
+    計算，回呼延遲不會累積，暫停/繼續也不會漂移。
+
+    schedule_once(callback, delay) 需回傳有 cancel() 的事件，
+    與 kivy.clock.Clock.schedule_once 相同；clock 預設為 time.monotonic。
+    """
+
+    def __init__(self, schedule_once, clock=time.monotonic):
+        self.schedule_once = schedule_once
+        self.clock = clock
+        self._timers = {}
+        self._heap = []  # (截止時間, 序號, 名稱)，已失效的項目在彈出時略過
+        self._seq = itertools.count()
+        self._event = None
+        self._armed_deadline = None
+
+    def start(self, name, seconds, callback):
+        """開始（或重新開始）計時，時間到時呼叫 callback(name, late)，late 為延遲的秒數"""
+        timer = _Timer(name, seconds, self.clock() + seconds, callback)
+        self._timers[name] = timer
+        heapq.heappush(self._heap, (timer.deadline, next(self._seq), name))
+        self._rearm()
+
+    def pause(self, name):
+        timer = self._timers.get(name)
+        if timer is None or timer.deadline is None:
+            return
+        timer.remaining = max(0.0, timer.deadline - self.clock())
+        timer.deadline = None
+        self._rearm()
+
+    def resume(self, name):
+        timer = self._timers.get(name)
+        if timer is None or timer.deadline is not None:
+            return
+        timer.deadline = self.clock() + timer.remaining
+        timer.remaining = None
+        heapq.heappush(self._heap, (timer.deadline, next(self._seq), name))
+        self._rearm()
+
+    def cancel(self, name):
+        if self._timers.pop(name, None) is not None:
+            self._rearm()
+
+    def is_running(self, name):
+        timer = self._timers.get(name)
+        return timer is not None and timer.deadline is not None
+
+    def is_paused(self, name):
+        timer = self._timers.get(name)
+        return timer is not None and timer.deadline is None
+
+    def duration(self, name):
+        timer = self._timers.get(name)
+        return timer.duration if timer is not None else 0
+
+    def remaining(self, name):
+        """剩餘秒數（浮點數），不存在的計時器為 0"""
+        timer = self._timers.get(name)
+        if timer is None:
+            return 0.0
+        if timer.deadline is None:
+            return timer.remaining
+        return max(0.0, timer.deadline - self.clock())
+
+    def deadline(self, name):
+        timer = self._timers.get(name)
+        return timer.deadline if timer is not None else None
+
+    def _valid(self, entry):
+        deadline, _, name = entry
+        timer = self._timers.get(name)
+        return timer is not None and timer.deadline == deadline
+
+    def _rearm(self):
+        while self._heap and not self._valid(self._heap[0]):
+            heapq.heappop(self._heap)
+        deadline = self._heap[0][0] if self._heap else None
+        if deadline == self._armed_deadline:
+            return
+        if self._event is not None:
+            self._event.cancel()
+            self._event = None
+        self._armed_deadline = deadline
+        if deadline is not None:
+            self._event = self.schedule_once(self._on_event, max(0.0, deadline - self.clock()))
+
+    def _on_event(self, dt=None):
+        self._event = None
+        self._armed_deadline = None
+        now = self.clock()
+        # 逐一觸發，前一個回呼取消的計時器不會再被呼叫
+        while self._heap and self._heap[0][0] <= now:
+            entry = heapq.heappop(self._heap)
+            if self._valid(entry):
+                timer = self._timers.pop(entry[2])
+                timer.callback(timer.name, now - entry[0])
+        self._rearm()
@@ -0,0 +1,303 @@
+import bisect
+
+from kivy.core.text import Label as CoreLabel
+from kivy.graphics import Color, Rectangle
+from kivy.properties import ListProperty, NumericProperty, StringProperty
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.widget import Widget
+
+from fonts import CachedButton, CachedLabel, font_for
+
+
+class ListRow(RecycleDataViewBehavior, BoxLayout):
+    """清單中的一列（文字 + 按鈕），捲動時由 RecycleView 重複使用
+
+    data 的欄位: text, button_text, disabled, on_press(row)
+    """
+
+    created = 0  # 建立過的列數
+    reused = 0  # 列被重新套用其他資料的次數
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        ListRow.created += 1
+        self.orientation = 'vertical'
+        self.data = None
+        self.label = CachedLabel(font_name="NotoSerifCJKtc")
+        self.button = CachedButton(font_name="NotoSerifCJKtc", on_press=self.on_button)  # 按鈕文字重複，共用貼圖
+        self.add_widget(self.label)
+        self.add_widget(self.button)
+
+    def refresh_view_attrs(self, rv, index, data):
+        """套用這一列的資料"""
+        if self.data is not None:
+            ListRow.reused += 1
+        self.data = data
+        self.label.text = data.get("text", "")
+        self.label.font_name = font_for(self.label.text)
+        has_button = data.get("on_press") is not None
+        self.button.text = data.get("button_text", "")
+        self.button.disabled = data.get("disabled", False) or not has_button
+        self.button.opacity = 1 if has_button else 0
+
+    @classmethod
+    def stats(cls):
+        return {"created": cls.created, "reused": cls.reused}
+
+    def on_button(self, instance):
+        if self.data and self.data.get("on_press"):
+            self.data["on_press"](self)
+
+
+def make_recycle_list(viewclass=ListRow, row_height=80, **kwargs):
+    """建立只產生可見列的清單，資料放在回傳值的 data 屬性"""
+    rv = RecycleView(**kwargs)
+    rv.viewclass = viewclass
+    layout = RecycleBoxLayout(
+        orientation='vertical',
+        default_size=(None, row_height),
+        default_size_hint=(1, None),
+        size_hint_y=None
+    )
+    layout.bind(minimum_height=layout.setter('height'))
+    rv.add_widget(layout)
+    return rv
+
+
+class ModelListBinding:
+    """把 PlanModel 的變動直接套用到 RecycleView.data，不重建整個清單
+
+    make_row(plan) 產生一列的資料，accept(plan) 決定計劃是否顯示在此清單，
+    有 key(plan) 時新增的列依 key 插入到排序後的位置（否則加在最後）。
+    _index 記錄每一列在 rv.data 中的位置；插入或刪除時只記下第一個變動的位置，
+    下次查詢時才重算其後的部分。
+    """
+
+    def __init__(self, rv, make_row, accept=None, empty_text=None, key=None):
+        self.rv = rv
+        self.make_row = make_row
+        self.accept = accept or (lambda plan: True)
+        self.key = key
+        self.empty_text = empty_text
+        self._rows = {}  # plan.id -> 目前顯示的列資料
+        self._index = {}  # plan.id -> 在 rv.data 的位置，_valid 之前的位置正確
+        self._valid = 0
+
+    def reset(self, plans):
+        """完整重建（第一次顯示或換日時）"""
+        self._rows = {}
+        self._index = {}
+        data = [self._row(plan) for plan in plans if self.accept(plan)]
+        self.rv.data = data or self._empty()
+        self._reindex(0)
+
+    def _row(self, plan):
+        row = self.make_row(plan)
+        row["plan"] = plan
+        self._rows[plan.id] = row
+        return row
+
+    def _empty(self):
+        return [{"text": self.empty_text}] if self.empty_text else []
+
+    def _reindex(self, start):
+        """start 之後的位置需要重算"""
+        self._valid = min(self._valid, start)
+
+    def _find(self, plan):
+        if plan.id not in self._rows:
+            return None
+        index = self._index.get(plan.id)
+        if index is None or index >= self._valid:
+            data = self.rv.data
+            for position in range(self._valid, len(data)):
+                self._index[data[position]["plan"].id] = position
+            self._valid = len(data)
+            index = self._index[plan.id]
+        return index
+
+    def on_insert(self, plan):
+        if not self.accept(plan):
+            return
+        if not self._rows:
+            self.rv.data = [self._row(plan)]  # 取代空清單提示
+            self._reindex(0)
+        elif self.key is not None:
+            row = self._row(plan)
+            index = bisect.bisect_right(self.rv.data, self._row_key(row), key=self._row_key)
+            self.rv.data.insert(index, row)
+            self._reindex(index)
+        else:
+            self.rv.data.append(self._row(plan))
+
+    def _row_key(self, row):
+        return self.key(row["plan"])
+
+    def on_insert_many(self, plans):
+        """大量新增時只指定一次 rv.data，畫面只重新排版一次"""
+        had_rows = bool(self._rows)
+        rows = [self._row(plan) for plan in plans if self.accept(plan)]
+        if rows:
+            data = (list(self.rv.data) if had_rows else []) + rows
+            if self.key is not None:
+                data.sort(key=self._row_key)
+                self._reindex(0)
+            elif not had_rows:
+                self._reindex(0)
+            self.rv.data = data
+
+    def on_remove(self, plan):
+        found = self._find(plan)
+        if found is None:
+            return
+        del self._rows[plan.id]
+        del self._index[plan.id]
+        self.rv.data.pop(found)
+        self._reindex(found)
+        if not self.rv.data:
+            self.rv.data = self._empty()
+
+    def on_expire(self, plan):
+        """計劃過期（已改為 Completed）：仍符合清單條件時更新該列，否則移除"""
+        self.on_update(plan)
+
+    def on_update(self, plan):
+        found = self._find(plan)
+        if found is None:
+            self.on_insert(plan)
+        elif self.accept(plan):
+            self.rv.data[found] = self._row(plan)
+        else:
+            self.on_remove(plan)
+
+
+class GlyphAtlas:
+    """把 0-9 與 : 一次繪製成一張白色貼圖，並記錄每個字所在的區域"""
+
+    GLYPHS = "0123456789:"
+    _atlases = {}  # (字體, 大小) -> GlyphAtlas
+
+    @classmethod
+    def get(cls, font_name, font_size):
+        key = (font_name, font_size)
+        atlas = cls._atlases.get(key)
+        if atlas is None:
+            atlas = cls._atlases[key] = cls(font_name, font_size)
+        return atlas
+
+    def __init__(self, font_name, font_size):
+        label = CoreLabel(text=self.GLYPHS, font_name=font_name, font_size=font_size)
+        label.refresh()
+        self.texture = label.texture
+        height = self.texture.height
+        self.regions = {}
+        x = 0
+        for index, glyph in enumerate(self.GLYPHS):
+            # 以前綴寬度計算每個字的右緣，包含字距
+            end = label.get_extents(self.GLYPHS[:index + 1])[0]
+            self.regions[glyph] = self.texture.get_region(x, 0, end - x, height)
+            x = end
+
+
+class TimerDisplay(Widget):
+    """倒數計時顯示
+
+    數字與冒號取自 GlyphAtlas，每次更新只替換各格的貼圖區域，
+    不重新排版繪製文字；顏色以 Color 指令套用，換色也不必重畫。
+    其他文字（例如「時間到！」）才會另外繪製。
+    """
+
+    text = StringProperty("00:00")
+    color = ListProperty([1, 1, 1, 1])
+    font_name = StringProperty("NotoSerifCJKtc")
+    font_size = NumericProperty("48sp")
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._rects = []
+        self._text_textures = {}
+        with self.canvas:
+            self._color = Color(*self.color)
+        self.bind(text=self._update, pos=self._update, size=self._update,
+                  font_name=self._update, font_size=self._update)
+        self.bind(color=self._update_color)
+        self._update()
+
+    def _update_color(self, *args):
+        self._color.rgba = self.color
+
+    def _textures(self):
+        atlas = GlyphAtlas.get(self.font_name, self.font_size)
+        if all(glyph in atlas.regions for glyph in self.text):
+            return [atlas.regions[glyph] for glyph in self.text]
+        texture = self._text_textures.get(self.text)
+        if texture is None:
+            label = CoreLabel(text=self.text, font_name=self.font_name, font_size=self.font_size)
+            label.refresh()
+            texture = self._text_textures[self.text] = label.texture
+        return [texture]
+
+    def _update(self, *args):
+        textures = [texture for texture in self._textures() if texture is not None]
+        if len(textures) != len(self._rects):
+            # 格數改變時才重建繪圖指令
+            for rect in self._rects:
+                self.canvas.remove(rect)
+            self._rects = []
+            with self.canvas:
+                for _ in textures:
+                    self._rects.append(Rectangle())
+        total = sum(texture.width for texture in textures)
+        x = self.center_x - total / 2
+        for rect, texture in zip(self._rects, textures):
+            rect.texture = texture
+            rect.size = texture.size
+            rect.pos = (x, self.center_y - texture.height / 2)
+            x += texture.width
+
+
+class Heatmap(Widget):
+    """日曆熱圖：每一欄是一週、每一列是星期幾（由星期一開始），顏色深淺代表完成數
+
+    每格的 Color/Rectangle 只建立一次，更新數值時只改顏色。
+    """
+
+    color = ListProperty([0.13, 0.55, 0.13, 1])
+    empty_color = ListProperty([0.2, 0.2, 0.2, 1])
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._cells = []  # (Color, Rectangle)
+        self._values = []
+        self.bind(pos=self._layout, size=self._layout)
+
+    def set_values(self, values):
+        """values 為由舊到新每天的數值，第一天是星期一；最後一週可以不滿 7 天"""
+        if len(values) != len(self._cells):
+            self.canvas.clear()
+            self._cells = []
+            with self.canvas:
+                for _ in values:
+                    self._cells.append((Color(), Rectangle()))
+            self._layout()
+        self._values = list(values)
+        peak = max(self._values, default=0) or 1
+        for (color, _), value in zip(self._cells, self._values):
+            if value:
+                level = 0.3 + 0.7 * value / peak
+                color.rgba = [channel * level for channel in self.color[:3]] + [1]
+            else:
+                color.rgba = self.empty_color
+
+    def _layout(self, *args):
+        weeks = max(1, -(-len(self._cells) // 7))
+        cell = min(self.width / weeks, self.height / 7)
+        left = self.center_x - cell * weeks / 2
+        top = self.center_y + cell * 7 / 2
+        for index, (_, rect) in enumerate(self._cells):
+            column, row = divmod(index, 7)
+            rect.pos = (left + column * cell + 1, top - (row + 1) * cell + 1)
+            rect.size = (max(0, cell - 2), max(0, cell - 2))